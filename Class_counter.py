@@ -1,12 +1,14 @@
 import streamlit as st
 import datetime
-import holidays
 import pandas as pd
-import math
+import perf
+from class_counting import holiday_calendar, SummaryPipeline, load_timetables, apply_extra_classes, batch_report
 
 # ---------------------------
 # Fixed Semester Dates
 # ---------------------------
+profile = perf.begin("Class Counter")
+
 st.title("Class Counter")
 st.write("by pranjal")
 
@@ -21,18 +23,16 @@ end_date = st.date_input("End Date", END_FIXED)
 # ---------------------------
 # Holidays (India + Winter Break)
 # ---------------------------
-holiday_list = holidays.India(years=range(start_date.year, end_date.year + 1))
-auto_holidays = {d: name for d, name in holiday_list.items() if start_date <= d <= end_date}
-
-# Winter Break: 25 Dec 2025 – 4 Jan 2026
-d = datetime.date(2025, 12, 25)
-while d <= datetime.date(2026, 1, 4):
-    auto_holidays[d] = "Winter Break"
-    d += datetime.timedelta(days=1)
+CUSTOM_HOLIDAYS = (
+    (datetime.date(2025, 12, 25), datetime.date(2026, 1, 4), "Winter Break"),
+    (datetime.date(2026, 1, 15), datetime.date(2026, 1, 15), "Makarsakranti"),
+    (datetime.date(2026, 3, 3), datetime.date(2026, 3, 4), "Holi"),
+)
 
-auto_holidays[datetime.date(2026, 1, 15)] = "Makarsakranti"
-auto_holidays[datetime.date(2026, 3, 3)] = "Holi"
-auto_holidays[datetime.date(2026, 3, 4)] = "Holi"
+# Built once per process for these years and overrides, then reused
+with perf.span("holiday calendar"):
+    calendar = holiday_calendar("IN", start_date.year, end_date.year, CUSTOM_HOLIDAYS)
+    auto_holidays = calendar.between(start_date, end_date)
 
 if "holidays" not in st.session_state:
     st.session_state.holidays = dict(auto_holidays)
@@ -85,14 +85,6 @@ for subs in schedule.values():
 max_len = max(len(v) for v in schedule.values())
 weekly_df = pd.DataFrame({k: v + [""]*(max_len-len(v)) for k,v in schedule.items()})
 
-# ---------------------------
-# Weekly Count
-# ---------------------------
-weekly_count = {s: 0 for s in all_subjects}
-for subs in schedule.values():
-    for s in subs:
-        weekly_count[s] += 1
-
 # ---------------------------
 # Default Extra Classes (EDIT THESE)
 # ---------------------------
@@ -125,70 +117,76 @@ for s in sorted(all_subjects):
     st.session_state.extra_taken[s] = extra_taken[s]
 
 # ---------------------------
-# Count timetable-based classes
-# ---------------------------
-# Till today
-till_today = {s: 0 for s in all_subjects}
-
-d = start_date
-while d <= end_date and d <= today:
-    if d not in st.session_state.holidays:
-        wd = d.strftime("%A")
-        if wd in schedule:
-            for s in schedule[wd]:
-                till_today[s] += 1
-    d += datetime.timedelta(days=1)
-
-# Full semester
-full_semester = {s: 0 for s in all_subjects}
-
-d = start_date
-while d <= end_date:
-    if d not in st.session_state.holidays:
-        wd = d.strftime("%A")
-        if wd in schedule:
-            for s in schedule[wd]:
-                full_semester[s] += 1
-    d += datetime.timedelta(days=1)
-
-# ---------------------------
-# Apply your rules
+# Sidebar: Add a Holiday
 # ---------------------------
-# Classes should have been completed till today = timetable till today + extra taken
-should_have_completed = {s: till_today[s] + extra_taken[s] for s in all_subjects}
-
-# Total classes in semester = timetable full semester + extra taken
-total_classes = {s: full_semester[s] + extra_taken[s] for s in all_subjects}
+st.sidebar.header("Add a Holiday")
+new_holiday = st.sidebar.date_input("Date", today, key="new_holiday_date")
+new_holiday_name = st.sidebar.text_input("Name", "Holiday", key="new_holiday_name")
+if st.sidebar.button("Add Holiday"):
+    st.session_state.holidays[new_holiday] = new_holiday_name
+    holiday_df = pd.DataFrame([
+        {"Date": d, "Day": d.strftime("%A"), "Holiday": n}
+        for d, n in sorted(st.session_state.holidays.items())
+    ])
 
 # ---------------------------
-# Final Summary
+# Final Summary (only stages whose inputs changed are recomputed)
 # ---------------------------
-rows = []
-for s in sorted(all_subjects):
-    total_sem = total_classes[s]
+if "summary_pipeline" not in st.session_state:
+    st.session_state.summary_pipeline = SummaryPipeline()
+pipeline = st.session_state.summary_pipeline
 
-    required_total = weekly_count[s] * 15
-    extra_needed = required_total - total_sem
-
-    need_90 = total_sem- math.ceil(0.90 * total_sem)
-    need_85 = total_sem- math.ceil(0.85 * total_sem)
-    need_80 = total_sem- math.ceil(0.80 * total_sem)
-
-    rows.append({
-        "Subject": s,
-        "Classes Should Have Completed Till Today": should_have_completed[s],
-        "Total Classes In Semester": total_sem,
-        "Extra Classes Required": extra_needed,
-        "Absents for 90%": need_90,
-        "Absents for 85%": need_85,
-        "Absents for 80%": need_80,
-    })
+with perf.span("summary pipeline"):
+    summary = pipeline.update(start_date, end_date, today, schedule, st.session_state.holidays, extra_taken)
+rows = [summary[s] for s in sorted(all_subjects)]
 
 st.subheader("Class Summary")
 st.table(pd.DataFrame(rows))
+if pipeline.last_run:
+    st.caption("Recomputed: " + "; ".join(f"{stage} ({detail}) {ms:.2f} ms" for stage, detail, ms in pipeline.last_run))
+else:
+    st.caption("Recomputed: nothing, all rows reused")
 
 st.subheader("List of Holidays")
 st.table(holiday_df)
 
 st.subheader("Weekly Timetable")
 st.table(weekly_df)
+
+# ---------------------------
+# Batch Mode: many timetables
+# ---------------------------
+st.subheader("Batch Mode")
+with st.expander("Summaries for many sections at once"):
+    st.write("Upload timetables as JSON (`{section: {schedule, extra_classes}}`) or CSV with "
+             "`section, day, subject` columns (one row per class), and optionally a CSV of "
+             "`section, subject, extra` extra classes. The dates and holidays above apply to every section.")
+    timetable_files = st.file_uploader("Timetables", type=["json", "csv"], accept_multiple_files=True)
+    extra_file = st.file_uploader("Extra classes (optional)", type=["csv"])
+
+    if timetable_files:
+        timetables, skipped = {}, []
+        for f in timetable_files:
+            try:
+                loaded, problems = load_timetables(f)
+            except ValueError as e:
+                st.error(f"Could not read {f.name}: {e}")
+                continue
+            timetables.update(loaded)
+            skipped += [f"{f.name}, {p}" for p in problems]
+        if extra_file is not None and timetables:
+            try:
+                skipped += [f"{extra_file.name}, {p}" for p in apply_extra_classes(timetables, extra_file)]
+            except ValueError as e:
+                st.error(f"Could not read {extra_file.name}: {e}")
+        if skipped:
+            st.warning("Skipped:\n" + "\n".join(f"- {p}" for p in skipped))
+        if timetables:
+            with perf.span("batch_report"):
+                report = batch_report(timetables, start_date, end_date, today, st.session_state.holidays)
+            st.caption(f"{len(timetables)} sections, {len(report)} subject rows")
+            st.dataframe(report)
+            st.download_button("Download combined report (CSV)", report.to_csv(index=False),
+                               "class_summary_report.csv", "text/csv")
+
+perf.end(profile)
@@ -1,155 +1,111 @@
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
-import numpy as np
-from scipy.integrate import simpson, trapezoid
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+import perf
+from graphaway_core import (
+    spectral_regions, load_dataset, DOWNSAMPLE_METHODS, DOWNSAMPLE_MAX_POINTS, SAVEFIG_OPTIONS,
+    data_fingerprint, render_graph, render_graph_webgl, render_pie_chart, render_bar_chart,
+    integrate_curve, sorted_columns, band_integrals
+)
 
 # ------------------ Utilities ------------------
-spectral_regions = [
-    ("Radio", 0, 3e9, "lightblue"),
-    ("Microwave", 3e9, 3e12, "lightgreen"),
-    ("Infrared", 3e12, 2.99e14, "lightcoral"),
-    ("Visible", 3.01e14, 7.5e14, "khaki"),
-    ("UV", 7.5e14, 3e16, "violet"),
-    ("X-ray", 3e16, 3e19, "orange"),
-    ("Gamma-ray", 3e19, 3e30, "red")
-]
-
 def read_file(uploaded_file):
     try:
-        if st.checkbox("Its a TXT file"):
-            df = pd.read_csv(uploaded_file, delim_whitespace=True, engine='python')
-        else:
-            df = pd.read_csv(uploaded_file, engine='python')
-
-        # Ensure numeric conversion
-        for col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
-
+        is_txt = st.checkbox("Its a TXT file")
+        status = st.empty()
+        with perf.span("read_file"):
+            df = load_dataset(uploaded_file, whitespace=is_txt,
+                              progress=lambda rows: status.caption(f"Reading… {rows:,} rows"))
+        status.empty()
         return df
     except Exception as e:
         st.error(f"Unsupported file format. Please upload a valid CSV file.\nError: {e}")
         return None
 
+# ------------------ Figure cache ------------------
+# Rendered PNGs are memoized on the dataset fingerprint plus every plot
+# argument, so reruns caused by unrelated widgets redisplay the stored image
+# instead of rebuilding the figure. Least recently used entries are dropped
+# once the total exceeds FIGURE_CACHE_MAX_BYTES.
+FIGURE_CACHE_MAX_BYTES = 64 * 1024 ** 2
+
+@st.cache_resource
+def figure_cache():
+    return {"entries": OrderedDict(), "bytes": 0, "lock": threading.Lock()}
+
+def cached_figure(key, build):
+    cache = figure_cache()
+    with cache["lock"]:
+        if key in cache["entries"]:
+            cache["entries"].move_to_end(key)
+            return cache["entries"][key]
+    value = build()
+    with cache["lock"]:
+        if key not in cache["entries"]:
+            cache["entries"][key] = value
+            cache["bytes"] += len(value[0])
+            while cache["bytes"] > FIGURE_CACHE_MAX_BYTES and len(cache["entries"]) > 1:
+                _, (png, _) = cache["entries"].popitem(last=False)
+                cache["bytes"] -= len(png)
+    return value
+
 def plot_graph(data, x_column, y_columns, color_groups, pattern_groups, bullet_groups,
                color_labels, pattern_labels, bullet_labels,
                x_log_scale, y_log_scale, x_range, y_range, 
-               title, x_label, y_label, font_sizes, marker_size, show_background=False):
-
-    plt.figure(figsize=(10, 6))
-    pattern_styles = {'solid': '-', 'dotted': ':', 'dashed': '--', 'dashdot': '-.'}
-    marker_styles_available = ['o', 's', '^', 'D', '*', '+', 'x']
-
-    # --- Background spectral regions ---
-    if show_background and y_range:
-        for label, x_min, x_max, color in spectral_regions:
-            plt.fill_between(
-                [x_min, x_max], [y_range[0]]*2, [y_range[1]]*2,
-                color=color, alpha=0.2, label=label
+               title, x_label, y_label, font_sizes, marker_size, show_background=False,
+               downsample="Off", max_points=DOWNSAMPLE_MAX_POINTS):
+    args = (x_column, y_columns, color_groups, pattern_groups, bullet_groups,
+            color_labels, pattern_labels, bullet_labels,
+            x_log_scale, y_log_scale, x_range, y_range,
+            title, x_label, y_label, font_sizes, marker_size, show_background,
+            downsample, max_points, show_legend)
+    key = hashlib.blake2b((data_fingerprint(data) + repr(args)).encode(), digest_size=20).hexdigest()
+
+    def build():
+        with perf.span("render figure"):
+            fig, points_drawn, points_total = render_graph(
+                data, x_column, y_columns,
+                color_groups, pattern_groups, bullet_groups,
+                color_labels, pattern_labels, bullet_labels,
+                x_log_scale, y_log_scale, x_range, y_range,
+                title, x_label, y_label, font_sizes, marker_size, show_background=show_background,
+                downsample=downsample, max_points=max_points, show_legend=show_legend
             )
-
-    # ------------------ Colors ------------------
-    color_idx = 0
-    column_colors, column_labels = {}, {}
-    for idx, group in enumerate(color_groups):
-        color = plt.cm.tab10(color_idx % 10)
-        color_idx += 1
-        label = color_labels[idx] if color_labels and idx < len(color_labels) else f"Group {idx+1}"
-        for col in group:
-            column_colors[col] = color
-            column_labels[col] = label
-
-    # ------------------ Patterns ------------------
-    column_linestyles, column_pattern_labels = {}, {}
-    for idx, group in enumerate(pattern_groups):
-        style = '-'
-        label = f"Pattern {idx+1}"
-        if pattern_labels and idx < len(pattern_labels):
-            label, style_key = pattern_labels[idx]
-            style = pattern_styles.get(style_key, '-')
-        for col in group:
-            column_linestyles[col] = style
-            column_pattern_labels[col] = label
-
-    # ------------------ Markers ------------------
-    column_markers, column_marker_labels = {}, {}
-    for idx, group in enumerate(bullet_groups):
-        marker = 'o'
-        label = f"Bullet {idx+1}"
-        if bullet_labels and idx < len(bullet_labels):
-            label, marker = bullet_labels[idx]
-        for col in group:
-            column_markers[col] = marker
-            column_marker_labels[col] = label
-
-    used_labels = set()
-
-    for col in y_columns:
-        color = column_colors.get(col, plt.cm.tab10(color_idx % 10))
-        if col not in column_colors:
-            color_idx += 1
-        linestyle = column_linestyles.get(col, '-')
-        marker = column_markers.get(col, 'o')
-        label = column_labels.get(col) or column_pattern_labels.get(col) or column_marker_labels.get(col) or col
-
-        if label not in used_labels:
-            plt.plot(data[x_column], data[col], marker=marker, markersize=marker_size,
-                     linestyle=linestyle, color=color, label=label)
-            used_labels.add(label)
-        else:
-            plt.plot(data[x_column], data[col], marker=marker, markersize=marker_size,
-                     linestyle=linestyle, color=color)
-
-    if x_log_scale:
-        plt.xscale('log')
-    if y_log_scale:
-        plt.yscale('log')
-    if x_range:
-        plt.xlim(x_range)
-    if y_range:
-        plt.ylim(y_range)
-    
-        
-    plt.title(title, fontsize=font_sizes.get("title", 16))
-    plt.xlabel(x_label, fontsize=font_sizes.get("labels", 14))
-    plt.ylabel(y_label, fontsize=font_sizes.get("labels", 14))
-    plt.xticks(fontsize=font_sizes.get("ticks", 12))
-    plt.yticks(fontsize=font_sizes.get("ticks", 12))
-    plt.grid(True)
-    if show_legend:
-        plt.legend(title="Legend", fontsize=font_sizes.get("legend", 12))    
-    plt.tight_layout()
-    st.pyplot(plt)
-
-
-def integrate_curve(x_data, y_data, log_x=False, log_y=False, method='trapezoid'):
-    if log_x:
-        x_data = np.power(10, x_data)
-    if log_y:
-        y_data = np.power(10, y_data)
-
-    n = len(x_data)
-
-    if method == 'trapezoid':
-        return trapezoid(y_data, x_data)
-    elif method == 'Simpson 1/3':
-        if n < 3:
-            return "❌ Simpson's 1/3 rule requires at least 3 points."
-        if (n - 1) % 2 != 0:
-            return "❌ Simpson's 1/3 rule requires an odd number of points."
-        return simpson(y_data, x_data)
-    elif method == 'Simpson 3/8':
-        if n < 4:
-            return "❌ Simpson's 3/8 rule requires at least 4 points."
-        if (n - 1) % 3 != 0:
-            return "❌ Simpson's 3/8 rule requires intervals multiple of 3."
-        h = (x_data[-1] - x_data[0]) / (n - 1)
-        result = y_data[0] + y_data[-1]
-        for i in range(1, n-1):
-            result += 3*y_data[i] if i % 3 != 0 else 2*y_data[i]
-        return (3*h/8) * result
-    else:
-        return "❌ Unknown method selected."
+        with perf.span("encode PNG"):
+            import matplotlib.pyplot as plt
+            image = io.BytesIO()
+            fig.savefig(image, **SAVEFIG_OPTIONS)
+            plt.close(fig)
+        return image.getvalue(), (points_drawn, points_total)
+
+    with perf.span("plot_graph"):
+        png, (points_drawn, points_total) = cached_figure(key, build)
+        st.image(png, width="stretch")
+    if points_drawn < points_total:
+        st.caption(f"Downsampled ({downsample}): drew {points_drawn:,} of {points_total:,} points")
+
+
+# ------------------ WebGL renderer ------------------
+# Same arguments and group semantics as plot_graph, drawn client-side with
+# plotly Scattergl: the full data is sent once and zoom/pan happen in the
+# browser without a rerun.
+def plot_graph_webgl(data, x_column, y_columns, color_groups, pattern_groups, bullet_groups,
+                     color_labels, pattern_labels, bullet_labels,
+                     x_log_scale, y_log_scale, x_range, y_range,
+                     title, x_label, y_label, font_sizes, marker_size, show_background=False):
+    with perf.span("render figure (WebGL)"):
+        fig = render_graph_webgl(
+            data, x_column, y_columns,
+            color_groups, pattern_groups, bullet_groups,
+            color_labels, pattern_labels, bullet_labels,
+            x_log_scale, y_log_scale, x_range, y_range,
+            title, x_label, y_label, font_sizes, marker_size, show_background=show_background,
+            show_legend=show_legend
+        )
+    with perf.span("st.plotly_chart"):
+        st.plotly_chart(fig)
 
 # ------------------ Line Graph ------------------
 
@@ -242,7 +198,7 @@ def linegraph():
             y_range = (float(y_min_str), float(y_max_str))
         except ValueError:
             st.error("Invalid axis range values. Use numeric or scientific notation (e.g., 1e-5).")
-            st.stop()
+            return
 
         # ------------------ Color & Pattern Groups ------------------
         with st.expander("🎨 Color Groups"):
@@ -268,22 +224,37 @@ def linegraph():
                     pattern_labels.append((label, pattern))
         
         show_background = st.sidebar.checkbox("Show Spectral Backgrounds", value=False)
+        renderer = st.sidebar.selectbox("Renderer", ["Matplotlib", "Interactive (WebGL)"])
+        if renderer == "Matplotlib":
+            downsample = st.sidebar.selectbox("Downsampling (long series)", DOWNSAMPLE_METHODS, index=1)
 
         if st.button("📊 Plot Line Graph"):
             if not color_groups:
                 color_groups = [[col] for col in y_columns]
                 color_labels = y_columns
-        
-            plot_graph(
-                data, x_column, y_columns,
-                color_groups, pattern_groups, bullet_groups,
-                color_labels, pattern_labels, bullet_labels,
-                x_log_scale, y_log_scale,
-                x_range, y_range,
-                title, x_axis_label, y_axis_label,
-                font_sizes, marker_size,show_background = show_background
 
-            )
+            if renderer == "Matplotlib":
+                plot_graph(
+                    data, x_column, y_columns,
+                    color_groups, pattern_groups, bullet_groups,
+                    color_labels, pattern_labels, bullet_labels,
+                    x_log_scale, y_log_scale,
+                    x_range, y_range,
+                    title, x_axis_label, y_axis_label,
+                    font_sizes, marker_size,show_background = show_background,
+                    downsample=downsample
+
+                )
+            else:
+                plot_graph_webgl(
+                    data, x_column, y_columns,
+                    color_groups, pattern_groups, bullet_groups,
+                    color_labels, pattern_labels, bullet_labels,
+                    x_log_scale, y_log_scale,
+                    x_range, y_range,
+                    title, x_axis_label, y_axis_label,
+                    font_sizes, marker_size, show_background=show_background
+                )
 
 
         # ------------------ Integration ------------------
@@ -295,24 +266,51 @@ def linegraph():
             method = st.selectbox("Integration method", ["trapezoid", "Simpson 1/3", "Simpson 3/8"])
 
             if st.button("➕ Calculate Integral"):
-                combined = data[[int_x_column, int_y_column]].copy()
-                combined[int_x_column] = pd.to_numeric(combined[int_x_column], errors='coerce')
-                combined[int_y_column] = pd.to_numeric(combined[int_y_column], errors='coerce')
-                combined = combined.dropna()
-                combined = combined.sort_values(by=int_x_column)
-
-                x_vals = combined[int_x_column].values
-                y_vals = combined[int_y_column].values
+                x_vals, y_vals = sorted_columns(data, int_x_column, [int_y_column])
+                y_vals = y_vals[:, 0]
 
                 if len(x_vals) < 2:
                     st.error("Not enough valid points for integration.")
                 else:
-                    result = integrate_curve(x_vals, y_vals, log_x=log_x_integ, log_y=log_y_integ, method=method)
+                    with perf.span("integrate_curve"):
+                        result = integrate_curve(x_vals, y_vals, log_x=log_x_integ, log_y=log_y_integ, method=method)
                     if isinstance(result, str) and result.startswith("❌"):
                         st.error(result)
                     else:
                         st.success(f"✅ Integral ({method}): {result:.4E}")
 
+        # ------------------ Band Integration ------------------
+        with st.expander("🌈 Band Integration (all selected columns)"):
+            import pandas as pd
+            band_x_column = st.selectbox("X-axis for band integration", columns, index=columns.index(x_column))
+            band_y_columns = st.multiselect("Columns to integrate", columns, default=y_columns)
+            log_x_band = st.checkbox("X column holds log10 values", value=False, key="band_log_x")
+            log_y_band = st.checkbox("Y columns hold log10 values", value=False, key="band_log_y")
+            st.caption("Bands are in linear x units (trapezoid rule). Edit, add or remove rows as needed.")
+            bands_df = st.data_editor(
+                pd.DataFrame([(name, lo, hi) for name, lo, hi, _ in spectral_regions],
+                             columns=["Band", "Min", "Max"]),
+                num_rows="dynamic", key="band_table"
+            )
+
+            if st.button("➕ Integrate Bands"):
+                bands = [(row.Band, float(row.Min), float(row.Max))
+                         for row in bands_df.dropna().itertuples(index=False)]
+                inverted = [str(name) for name, lo, hi in bands if lo > hi]
+                x_vals, y_vals = sorted_columns(data, band_x_column, band_y_columns)
+                if not band_y_columns or not bands:
+                    st.error("Select at least one column and one band.")
+                elif inverted:
+                    st.error(f"Min is greater than Max for band(s): {', '.join(inverted)}.")
+                elif len(x_vals) < 2:
+                    st.error("Not enough valid points for integration.")
+                else:
+                    with perf.span("band_integrals"):
+                        fluxes = pd.DataFrame(band_integrals(x_vals, y_vals, bands, log_x=log_x_band, log_y=log_y_band),
+                                              index=[band[0] for band in bands], columns=band_y_columns)
+                    st.dataframe(fluxes.style.format("{:.4E}"))
+                    st.download_button("⬇️ Download band fluxes (CSV)", fluxes.to_csv(), "band_fluxes.csv", "text/csv")
+
 # ------------------ Pie Chart ------------------
 
 def plot_pie_chart():
@@ -327,10 +325,10 @@ def plot_pie_chart():
     st.subheader("Data Preview")
     st.write(data)
     column = st.selectbox("Select column for pie chart", data.columns)
-    fig, ax = plt.subplots()
-    data[column].value_counts().plot.pie(autopct='%1.1f%%', ax=ax)
-    ax.set_title(f"Pie Chart of {column}")
-    st.pyplot(fig)
+    with perf.span("render figure"):
+        fig = render_pie_chart(data, column)
+    with perf.span("st.pyplot"):
+        st.pyplot(fig)
 
 # ------------------ Bar Chart ------------------
 
@@ -351,23 +349,15 @@ def plot_bar_chart():
     y_column = st.selectbox("Y-axis column", columns, index=1)
 
     use_labels = st.checkbox("Use custom labels from column?")
-    if use_labels:
-        label_column = st.selectbox("Label column", columns)
-        labels = data[label_column].astype(str)
-    else:
-        labels = data[x_column].astype(str)
-
-    fig, ax = plt.subplots()
-    ax.bar(labels, data[y_column])
-    ax.set_xlabel(x_column)
-    ax.set_ylabel(y_column)
-    ax.set_title(f"{y_column} vs {x_column}")
-    plt.xticks(rotation=45, ha='right')
-    plt.tight_layout()
-    st.pyplot(fig)
+    label_column = st.selectbox("Label column", columns) if use_labels else None
 
-# ------------------ Main ------------------
+    with perf.span("render figure"):
+        fig = render_bar_chart(data, x_column, y_column, label_column)
+    with perf.span("st.pyplot"):
+        st.pyplot(fig)
 
+# ------------------ Main ------------------
+profile = perf.begin("Graphaway")
 
 st.sidebar.title("Visualization Tools")
 st.sidebar.write("Developed by Pranjal Sharma")
@@ -398,3 +388,5 @@ for i, app in enumerate(apps):
         st.markdown("---")
 #--------------------------------------------------------------------------------------------------------
 st.markdown("""<script defer src="https://cloud.umami.is/script.js" data-website-id="5b32328f-cbd6-4e11-8eba-fb882c6b462f"></script>""", unsafe_allow_html=True)
+
+perf.end(profile)
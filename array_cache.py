@@ -0,0 +1,88 @@
+# On-disk cache of numeric arrays as .npy files with a .json sidecar of column
+# names, shared by graphaway_core (parsed datasets) and cloudy_reader (parsed
+# Cloudy sections). Entries are read back as read-only memory maps, so a hit
+# costs no parsing and no copy.
+#
+# Writes go to temporary names first and are moved into place, so a concurrent
+# reader never sees a partial file. Reading an entry refreshes its modification
+# time; evict() deletes entries unused for longer than max_age seconds, and the
+# least recently used ones beyond max_bytes in total. evict_lru() applies the
+# same rule to any other kind of entry (cloudy_grid's extracted uploads), and
+# content_digest() hashes the files that name such entries.
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+def content_digest(source):
+    # blake2b of a file on disk (read in blocks) or of an in-memory buffer; callers
+    # may update() it with their own options before taking hexdigest()
+    digest = hashlib.blake2b(digest_size=20)
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            for block in iter(lambda: f.read(8 * 1024 ** 2), b""):
+                digest.update(block)
+    else:
+        digest.update(source.getbuffer())
+    return digest
+
+def evict_lru(entries, max_bytes, max_age, remove):
+    # entries: (mtime, size, item); calls remove(item) for each one to delete
+    now = time.time()
+    total = 0
+    for mtime, size, item in sorted(entries, key=lambda e: e[0], reverse=True):   # most recently used first
+        total += size
+        if now - mtime > max_age or total > max_bytes:
+            remove(item)
+
+def _paths(cache_dir, key):
+    return os.path.join(cache_dir, key + ".npy"), os.path.join(cache_dir, key + ".json")
+
+def load(cache_dir, key):
+    # (memory-mapped values, columns), or None when the entry is missing
+    array_path, meta_path = _paths(cache_dir, key)
+    try:
+        with open(meta_path) as f:
+            columns = json.load(f)["columns"]
+        values = np.load(array_path, mmap_mode="r")
+        os.utime(array_path)
+        os.utime(meta_path)
+    except FileNotFoundError:
+        return None
+    return values, columns
+
+def store(cache_dir, key, values, columns, max_bytes, max_age):
+    os.makedirs(cache_dir, exist_ok=True)
+    array_path, meta_path = _paths(cache_dir, key)
+    with tempfile.NamedTemporaryFile(dir=cache_dir, suffix=".npy.tmp", delete=False) as f:
+        np.save(f, values)
+    os.replace(f.name, array_path)
+    with tempfile.NamedTemporaryFile("w", dir=cache_dir, suffix=".json.tmp", delete=False) as f:
+        json.dump({"columns": [str(c) for c in columns]}, f)
+    os.replace(f.name, meta_path)
+    evict(cache_dir, max_bytes, max_age)
+
+def evict(cache_dir, max_bytes, max_age):
+    if not os.path.isdir(cache_dir):
+        return
+    entries = []
+    for name in os.listdir(cache_dir):
+        if not name.endswith(".npy"):
+            continue
+        paths = _paths(cache_dir, name[:-4])
+        try:
+            stat = os.stat(paths[0])
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, paths))
+    evict_lru(entries, max_bytes, max_age, _remove_entry)
+
+def _remove_entry(paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
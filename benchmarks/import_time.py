@@ -0,0 +1,72 @@
+# Cold-start cost of GraphAway: import time of graphaway_core and the time of
+# the app's first render, each measured in fresh interpreters, plus which heavy
+# libraries they pulled in.
+#
+#   python benchmarks/import_time.py                  # the working tree
+#   python benchmarks/import_time.py --rev HEAD~1     # a committed revision, for before/after
+import argparse
+import io
+import json
+import os
+import subprocess
+import sys
+import tarfile
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ["pandas", "matplotlib", "matplotlib.pyplot", "scipy", "scipy.integrate", "plotly.graph_objects"]
+
+# (setup run before the clock starts, timed body)
+PROBES = {
+    "import graphaway_core": ("", "import graphaway_core"),
+    "Graphaway.py first render": (
+        "from streamlit.testing.v1 import AppTest",
+        "AppTest.from_file('Graphaway.py', default_timeout=120).run()",
+    ),
+    "Graphaway.py first render (Pie Chart)": (
+        "from streamlit.testing.v1 import AppTest",
+        "at = AppTest.from_file('Graphaway.py', default_timeout=120).run()\n"
+        "at.sidebar.selectbox[0].set_value('Pie Chart').run()",
+    ),
+}
+
+PROBE_TEMPLATE = """
+import json, sys, time
+{setup}
+before = set(sys.modules)
+t0 = time.perf_counter()
+{body}
+elapsed = time.perf_counter() - t0
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {heavy!r} if m in sys.modules and m not in before]}}))
+"""
+
+def run_probe(tree, setup, body, repeat):
+    code = PROBE_TEMPLATE.format(setup=setup, body=body, heavy=HEAVY)
+    runs = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", code], cwd=tree, capture_output=True, text=True, check=True)
+        runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    best = min(runs, key=lambda r: r["seconds"])
+    return best["seconds"], best["loaded"]
+
+def checkout(rev):
+    tree = tempfile.mkdtemp(prefix="graphaway_rev_")
+    archive = subprocess.run(["git", "-C", ROOT, "archive", rev], capture_output=True, check=True).stdout
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        tar.extractall(tree)
+    return tree
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure GraphAway cold-start import and render time.")
+    parser.add_argument("--rev", help="git revision to measure instead of the working tree")
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters per probe (best is reported)")
+    args = parser.parse_args(argv)
+
+    tree = checkout(args.rev) if args.rev else ROOT
+    print(f"{args.rev or 'working tree'} (best of {args.repeat})")
+    for name, (setup, body) in PROBES.items():
+        seconds, loaded = run_probe(tree, setup, body, args.repeat)
+        print(f"  {name:<40} {seconds * 1000:>8.0f} ms   loads: {', '.join(loaded) or '-'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+# Benchmarks for the numeric kernels behind the Streamlit tools.
+#
+#   python benchmarks/run.py                      # run and compare with baselines.json
+#   python benchmarks/run.py --quick              # smallest size of each case only
+#   python benchmarks/run.py -k integrate         # cases whose name contains "integrate"
+#   python benchmarks/run.py --threshold 0.5      # allow 50% slowdown before failing
+#   python benchmarks/run.py --save-baseline      # record this machine's numbers
+#
+# Every case builds synthetic inputs of increasing size and takes --repeat
+# samples of the kernel; like timeit, fast kernels are looped inside a sample
+# until it lasts at least MIN_SAMPLE_S. It records the best and median time per
+# call, the throughput (items per second, where an item is a redshift, a row or
+# a day) and the peak memory traced by tracemalloc in a separate, untimed run.
+# A case regresses when its best time exceeds the baseline by more than the
+# threshold (the best time is far less noisy than the median on a shared box),
+# or its peak memory exceeds the baseline by more than the memory threshold and
+# by at least MEMORY_FLOOR bytes; the exit status is 1 if any case regressed. Everything runs offline; baselines are only
+# meaningful on the machine that recorded them.
+import argparse
+import datetime
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# Keep the dataset cache of the benchmarks away from the app's cache
+os.environ["GRAPHAWAY_CACHE_DIR"] = tempfile.mkdtemp(prefix="graphaway_bench_")
+
+import cosmology
+import graphaway_core
+import class_counting
+
+BASELINES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+DEFAULT_THRESHOLD = 0.25
+DEFAULT_MEMORY_THRESHOLD = 0.10
+MEMORY_FLOOR = 64 * 1024      # smaller changes are allocator noise
+MIN_SAMPLE_S = 0.05
+
+# ------------------ Cases ------------------
+# Each case maps a size to (setup, items); setup() returns the callable to time.
+
+def cosmology_scalar(n):
+    z = np.linspace(0.01, 20, n)
+    return lambda: [cosmology.cosmology_calculator(zi, 69.6, 0.3, 0.6) for zi in z], n
+
+def cosmology_batch(n):
+    z = np.linspace(0.01, 20, n)
+    return lambda: cosmology.cosmology_calculator_batch(z, 69.6, 0.3, 0.6), n
+
+def integrate_curve(method):
+    def case(n):
+        x = np.linspace(1.0, 1e3, n)
+        y = np.sin(x) + 2.0
+        # Sizes are 6k+1 points so both Simpson rules accept them
+        result = graphaway_core.integrate_curve(x, y, method=method)
+        if isinstance(result, str):
+            raise ValueError(result)
+        return lambda: graphaway_core.integrate_curve(x, y, method=method), n
+    return case
+
+def band_integrals(n):
+    x = np.logspace(0, 30, n)
+    Y = np.random.default_rng(0).random((n, 8))
+    bands = [(name, lo, hi) for name, lo, hi, _ in graphaway_core.spectral_regions]
+    return lambda: graphaway_core.band_integrals(x, Y, bands), n
+
+def _csv_bytes(n):
+    rng = np.random.default_rng(0)
+    data = rng.random((n, 4))
+    buffer = io.StringIO()
+    np.savetxt(buffer, data, delimiter=",", header="nu,incident,trans,total", comments="", fmt="%.8e")
+    return buffer.getvalue().encode()
+
+def read_file_cold(n):
+    data = _csv_bytes(n)
+    return lambda: graphaway_core.stream_read(io.BytesIO(data)), n
+
+def read_file_cached(n):
+    path = os.path.join(tempfile.mkdtemp(prefix="graphaway_bench_"), "data.csv")
+    with open(path, "wb") as f:
+        f.write(_csv_bytes(n))
+    graphaway_core.load_dataset(path)       # fill the dataset cache
+    return lambda: graphaway_core.load_dataset(path), n
+
+SCHEDULE = {
+    "Monday": ["A", "B", "C", "C"], "Tuesday": ["B", "D", "E", "D", "D"],
+    "Wednesday": ["F", "B", "E", "A"], "Thursday": ["F", "D"], "Friday": ["D", "F", "A", "C", "C"],
+}
+
+def _date_range(days):
+    start = datetime.date(2000, 1, 1)
+    end = start + datetime.timedelta(days=days - 1)
+    rng = np.random.default_rng(0)
+    holidays = {start + datetime.timedelta(days=int(d)) for d in rng.integers(0, days, days // 20)}
+    return start, end, start + datetime.timedelta(days=days // 2), holidays
+
+def summary_rebuild(days):
+    # First run of the page's summary: every stage is built from scratch
+    start, end, cutoff, holidays = _date_range(days)
+    return lambda: class_counting.SummaryPipeline().update(start, end, cutoff, SCHEDULE, holidays, {}), days
+
+def summary_holiday(days):
+    # A rerun after adding or removing one holiday: only its weekday is recounted
+    start, end, cutoff, holidays = _date_range(days)
+    pipeline = class_counting.SummaryPipeline()
+    pipeline.update(start, end, cutoff, SCHEDULE, holidays, {})
+    toggled = holidays ^ {start + datetime.timedelta(days=days // 3)}
+    state = [holidays, toggled]
+
+    def run():
+        state.reverse()
+        pipeline.update(start, end, cutoff, SCHEDULE, state[0], {})
+    return run, days
+
+def batch_report(days):
+    start, end, cutoff, holidays = _date_range(days)
+    timetables = {f"S{i}": {"schedule": SCHEDULE, "extra_classes": {}} for i in range(100)}
+    return lambda: class_counting.batch_report(timetables, start, end, cutoff, holidays), days
+
+CASES = {
+    "cosmology_calculator": (cosmology_scalar, [10, 100, 1000]),
+    "cosmology_calculator_batch": (cosmology_batch, [1_000, 100_000, 1_000_000]),
+    "integrate_curve[trapezoid]": (integrate_curve("trapezoid"), [10_003, 1_000_003, 10_000_003]),
+    "integrate_curve[Simpson 1/3]": (integrate_curve("Simpson 1/3"), [10_003, 1_000_003, 10_000_003]),
+    "integrate_curve[Simpson 3/8]": (integrate_curve("Simpson 3/8"), [10_003, 1_000_003, 10_000_003]),
+    "band_integrals": (band_integrals, [10_000, 1_000_000]),
+    "read_file[parse]": (read_file_cold, [10_000, 100_000, 1_000_000]),
+    "read_file[cached]": (read_file_cached, [10_000, 100_000, 1_000_000]),
+    "SummaryPipeline.update[rebuild]": (summary_rebuild, [120, 3_650, 36_500]),
+    "SummaryPipeline.update[holiday]": (summary_holiday, [120, 3_650, 36_500]),
+    "batch_report": (batch_report, [120, 3_650, 36_500]),
+}
+
+# ------------------ Runner ------------------
+
+def measure(setup, size, repeat):
+    func, items = setup(size)
+    t0 = time.perf_counter()
+    func()                                   # warm-up, also sizes the loop
+    number = max(1, int(MIN_SAMPLE_S / max(time.perf_counter() - t0, 1e-9)))
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            func()
+        times.append((time.perf_counter() - t0) / number)
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    median = statistics.median(times)
+    return {"median_s": median, "min_s": min(times), "items_per_s": items / median if median else float("inf"),
+            "peak_bytes": peak}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the numeric kernels.")
+    parser.add_argument("-k", dest="pattern", default="", help="only cases whose name contains this")
+    parser.add_argument("--quick", action="store_true", help="smallest size of each case only")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed relative slowdown against the baseline (default 0.25)")
+    parser.add_argument("--memory-threshold", type=float, default=DEFAULT_MEMORY_THRESHOLD,
+                        help="allowed relative growth of peak memory against the baseline (default 0.10)")
+    parser.add_argument("--baseline", default=BASELINES, help="baseline JSON file")
+    parser.add_argument("--save-baseline", action="store_true", help="write results to the baseline file")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    try:
+        with open(args.baseline) as f:
+            baselines = json.load(f)
+    except FileNotFoundError:
+        baselines = {}
+
+    results, regressions = {}, []
+    print(f"{'case':<32} {'size':>10} {'best':>11} {'median':>11} {'items/s':>12} {'peak MB':>9}  vs baseline")
+    for name, (setup, sizes) in CASES.items():
+        if args.pattern not in name:
+            continue
+        for size in sizes[:1] if args.quick else sizes:
+            key = f"{name}@{size}"
+            result = measure(setup, size, args.repeat)
+            results[key] = result
+            base = baselines.get(key)
+            if base:
+                change = result["min_s"] / base["min_s"] - 1
+                growth = result["peak_bytes"] - base["peak_bytes"]
+                memory_change = growth / base["peak_bytes"] if base["peak_bytes"] else 0.0
+                verdict = f"{change:+.0%} time, {memory_change:+.0%} memory"
+                if change > args.threshold:
+                    verdict += "  REGRESSION"
+                    regressions.append(key)
+                if growth >= MEMORY_FLOOR and memory_change > args.memory_threshold:
+                    verdict += "  MEMORY REGRESSION"
+                    regressions.append(key + " (memory)")
+            else:
+                verdict = "no baseline"
+            print(f"{name:<32} {size:>10,} {result['min_s'] * 1000:>9.3f}ms {result['median_s'] * 1000:>9.3f}ms "
+                  f"{result['items_per_s']:>12.3g} {result['peak_bytes'] / 1024 ** 2:>9.2f}  {verdict}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.save_baseline:
+        baselines.update(results)
+        with open(args.baseline, "w") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+        print(f"Saved {len(results)} baselines to {args.baseline}")
+    if regressions:
+        print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%} time or {args.memory_threshold:.0%} memory: "
+              f"{', '.join(regressions)}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,313 @@
+import datetime
+import functools
+import io
+import json
+import math
+import time
+
+import numpy as np
+import pandas as pd
+
+# ---------------------------
+# Counting rules shared by Class_counter.py and the batch engine
+# ---------------------------
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+SEMESTER_WEEKS = 15
+ATTENDANCE_LEVELS = [90, 85, 80]
+
+def weekday_totals(start, end):
+    # Number of Mondays, Tuesdays, ... in [start, end]: whole weeks plus the remainder
+    counts = [0] * 7
+    if end < start:
+        return counts
+    full_weeks, extra_days = divmod((end - start).days + 1, 7)
+    counts = [full_weeks] * 7
+    for i in range(extra_days):
+        counts[(start.weekday() + i) % 7] += 1
+    return counts
+
+def teaching_day_totals(start, end, cutoff, holiday_dates):
+    # Teaching days per weekday, (till cutoff, full range): weekday totals minus
+    # the holidays that fall in range.
+    full_days = weekday_totals(start, end)
+    till_days = weekday_totals(start, min(end, cutoff))
+    for d in holiday_dates:
+        wd = d.weekday()
+        if start <= d <= end:
+            full_days[wd] -= 1
+            if d <= cutoff:
+                till_days[wd] -= 1
+    return till_days, full_days
+
+def summary_row(subject, weekly, till, full, extra):
+    # Classes should have been completed till today = timetable till today + extra taken
+    # Total classes in semester = timetable full semester + extra taken
+    total_sem = full + extra
+    row = {
+        "Subject": subject,
+        "Classes Should Have Completed Till Today": till + extra,
+        "Total Classes In Semester": total_sem,
+        "Extra Classes Required": weekly * SEMESTER_WEEKS - total_sem,
+    }
+    for level in ATTENDANCE_LEVELS:
+        row[f"Absents for {level}%"] = total_sem - math.ceil(level / 100 * total_sem)
+    return row
+
+# ---------------------------
+# Incremental summary for one timetable
+# ---------------------------
+# Three stages, each keyed on its own inputs:
+#   calendar: teaching days per weekday for (start, end, cutoff, holidays)
+#   counts:   per-subject (till, full) = periods per weekday . teaching days
+#   rows:     summary_row for (weekly, till, full, extra)
+# A new or removed holiday only adjusts its weekday, so only subjects meeting
+# on that weekday are recounted; an extra-class edit only rebuilds that row.
+# Kept in st.session_state so it survives reruns.
+class SummaryPipeline:
+    def __init__(self):
+        self.range = None
+        self.holidays = frozenset()
+        self.till_days = self.full_days = None
+        self.periods = {}
+        self.counts = {}
+        self.row_inputs = {}
+        self.rows = {}
+        self.last_run = []
+
+    def _calendar(self, start, end, cutoff, holiday_dates):
+        # Returns the weekdays whose teaching-day counts changed
+        holiday_dates = frozenset(holiday_dates)
+        if self.range != (start, end, cutoff):
+            till_days, full_days = teaching_day_totals(start, end, cutoff, holiday_dates)
+            changed = {wd for wd in range(7) if self.full_days is None
+                       or (till_days[wd], full_days[wd]) != (self.till_days[wd], self.full_days[wd])}
+            self.range, self.holidays = (start, end, cutoff), holiday_dates
+            self.till_days, self.full_days = till_days, full_days
+            return changed, "rebuilt"
+        added, removed = holiday_dates - self.holidays, self.holidays - holiday_dates
+        if not added and not removed:
+            return set(), None
+        changed = set()
+        for dates, sign in ((added, -1), (removed, 1)):
+            for d in dates:
+                if start <= d <= end:
+                    changed.add(d.weekday())
+                    self.full_days[d.weekday()] += sign
+                    if d <= cutoff:
+                        self.till_days[d.weekday()] += sign
+        self.holidays = holiday_dates
+        return changed, f"{len(added)} added, {len(removed)} removed"
+
+    def update(self, start, end, cutoff, schedule, holiday_dates, extra):
+        # Returns {subject: summary row}; self.last_run lists (stage, detail, ms)
+        self.last_run = []
+        t0 = time.perf_counter()
+        changed_weekdays, how = self._calendar(start, end, cutoff, holiday_dates)
+        if how:
+            self.last_run.append(("calendar", how, (time.perf_counter() - t0) * 1000))
+
+        t0 = time.perf_counter()
+        periods = {}
+        for day, subjects in schedule.items():
+            for s in subjects:
+                periods.setdefault(s, [0] * 7)[WEEKDAYS.index(day)] += 1
+        recounted = []
+        for s, per_day in periods.items():
+            meets_changed_day = any(per_day[wd] for wd in changed_weekdays)
+            if s not in self.counts or self.periods.get(s) != per_day or meets_changed_day:
+                self.counts[s] = (sum(p * n for p, n in zip(per_day, self.till_days)),
+                                  sum(p * n for p, n in zip(per_day, self.full_days)))
+                recounted.append(s)
+        self.periods = periods
+        for s in set(self.counts) - set(periods):
+            del self.counts[s]
+        if recounted:
+            self.last_run.append(("counts", f"{len(recounted)} subjects", (time.perf_counter() - t0) * 1000))
+
+        t0 = time.perf_counter()
+        rebuilt = []
+        for s, per_day in periods.items():
+            inputs = (sum(per_day), *self.counts[s], extra.get(s, 0))
+            if self.row_inputs.get(s) != inputs:
+                self.rows[s] = summary_row(s, *inputs)
+                self.row_inputs[s] = inputs
+                rebuilt.append(s)
+        for s in set(self.rows) - set(periods):
+            del self.rows[s], self.row_inputs[s]
+        if rebuilt:
+            self.last_run.append(("rows", ", ".join(sorted(rebuilt)), (time.perf_counter() - t0) * 1000))
+        return self.rows
+
+# ---------------------------
+# Holiday calendars
+# ---------------------------
+# Holidays as a sorted datetime64 array with matching names, so range queries
+# are two binary searches instead of a scan over a dict.
+class HolidayCalendar:
+    def __init__(self, named_dates):
+        items = sorted(named_dates.items())
+        self.dates = np.array([d for d, _ in items], dtype="datetime64[D]")
+        self.names = [n for _, n in items]
+
+    def between(self, start, end):
+        # {date: name} for holidays in [start, end]
+        lo = np.searchsorted(self.dates, np.datetime64(start, "D"), side="left")
+        hi = np.searchsorted(self.dates, np.datetime64(end, "D"), side="right")
+        return dict(zip(self.dates[lo:hi].astype(datetime.date), self.names[lo:hi]))
+
+# One calendar per (country, years, overrides), built on first use and reused
+# by every rerun and session in the process. `overrides` is a tuple of
+# (first_date, last_date, name) ranges added on top of the public holidays;
+# changing any part of the key builds a new calendar, and
+# holiday_calendar.cache_clear() drops them all.
+@functools.lru_cache(maxsize=32)
+def holiday_calendar(country, first_year, last_year, overrides=()):
+    import holidays
+
+    named = dict(holidays.country_holidays(country, years=range(first_year, last_year + 1)))
+    for first, last, name in overrides:
+        d = first
+        while d <= last:
+            named[d] = name
+            d += datetime.timedelta(days=1)
+    return HolidayCalendar(named)
+
+# ---------------------------
+# Batch mode: many timetables at once
+# ---------------------------
+# Timetables are {section: {"schedule": {weekday: [subjects]}, "extra_classes": {subject: n}}}.
+# Accepted files:
+#   JSON: that mapping, or a list of {"section", "schedule", "extra_classes"} objects
+#   CSV:  one row per period with columns section, day, subject
+# Extra classes can also come from a CSV with columns section, subject, extra.
+
+def _read_text(source):
+    if isinstance(source, str):
+        with open(source, encoding="utf-8") as f:
+            return f.read()
+    data = source.read()
+    return data.decode("utf-8") if isinstance(data, bytes) else data
+
+def normalize_day(day):
+    # "monday", " Mon ", "TUES" -> "Monday", "Tuesday"; None if not a weekday
+    key = str(day).strip().lower()
+    if len(key) >= 3:
+        for name in WEEKDAYS:
+            if name.lower().startswith(key):
+                return name
+    return None
+
+def _require_columns(frame, columns, what):
+    missing = [c for c in columns if c not in frame.columns]
+    if missing:
+        raise ValueError(f"{what} CSV needs columns {', '.join(columns)}; missing {', '.join(missing)}")
+
+def _extra_count(value):
+    # Non-negative whole number of extra classes, or None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return int(number) if number >= 0 and number.is_integer() else None
+
+# Both loaders raise ValueError for files they cannot read at all, and return
+# a list of messages for the rows or entries they skipped.
+def load_timetables(source, name=None):
+    name = name or getattr(source, "name", source)
+    text = _read_text(source)
+    timetables, skipped = {}, []
+    if str(name).lower().endswith(".json"):
+        loaded = json.loads(text)
+        if isinstance(loaded, list):
+            if not all(isinstance(entry, dict) and "section" in entry for entry in loaded):
+                raise ValueError("every timetable in a JSON list needs a \"section\"")
+            loaded = {entry["section"]: entry for entry in loaded}
+        if not isinstance(loaded, dict):
+            raise ValueError("JSON timetables must be an object or a list of objects")
+        for section, entry in loaded.items():
+            section = str(section)
+            if not isinstance(entry, dict):
+                skipped.append(f"{section}: should be an object with \"schedule\" and \"extra_classes\"")
+                continue
+            if not isinstance(entry.get("schedule", {}), dict):
+                skipped.append(f"{section}: \"schedule\" should map weekdays to lists of subjects")
+                continue
+            if not isinstance(entry.get("extra_classes", {}), dict):
+                skipped.append(f"{section}: \"extra_classes\" should map subjects to counts")
+                continue
+            schedule = {}
+            for day, subjects in entry.get("schedule", {}).items():
+                weekday = normalize_day(day)
+                if weekday is None:
+                    skipped.append(f"{section}: unknown day '{day}'")
+                elif not isinstance(subjects, list):
+                    skipped.append(f"{section}: {weekday} should list subjects")
+                else:
+                    schedule.setdefault(weekday, []).extend(str(s).strip() for s in subjects)
+            extra = {}
+            for subject, count in entry.get("extra_classes", {}).items():
+                if _extra_count(count) is None:
+                    skipped.append(f"{section}: extra classes for '{subject}' is not a whole number")
+                else:
+                    extra[str(subject)] = _extra_count(count)
+            timetables[section] = {"schedule": schedule, "extra_classes": extra}
+        return timetables, skipped
+
+    periods = pd.read_csv(io.StringIO(text), dtype=str)
+    _require_columns(periods, ["section", "day", "subject"], "Timetable")
+    for line, row in enumerate(periods.itertuples(index=False), start=2):
+        if pd.isna(row.section) or pd.isna(row.day) or pd.isna(row.subject):
+            skipped.append(f"line {line}: blank section, day or subject")
+            continue
+        weekday = normalize_day(row.day)
+        if weekday is None:
+            skipped.append(f"line {line}: unknown day '{row.day}'")
+            continue
+        entry = timetables.setdefault(row.section.strip(), {"schedule": {}, "extra_classes": {}})
+        entry["schedule"].setdefault(weekday, []).append(row.subject.strip())
+    return timetables, skipped
+
+def apply_extra_classes(timetables, source):
+    # Updates timetables in place; returns the skipped-row messages
+    extra = pd.read_csv(io.StringIO(_read_text(source)), dtype=str)
+    _require_columns(extra, ["section", "subject", "extra"], "Extra classes")
+    skipped = []
+    for line, row in enumerate(extra.itertuples(index=False), start=2):
+        count = _extra_count(row.extra)
+        if pd.isna(row.section) or pd.isna(row.subject) or count is None:
+            skipped.append(f"line {line}: needs a section, a subject and a whole number of extra classes")
+        elif row.section.strip() not in timetables:
+            skipped.append(f"line {line}: unknown section '{row.section}'")
+        else:
+            timetables[row.section.strip()]["extra_classes"][row.subject.strip()] = count
+    return skipped
+
+def batch_report(timetables, start, end, cutoff, holiday_dates):
+    # One summary row per (section, subject) for every timetable, in a single
+    # matrix product: a (rows x 7) periods-per-weekday matrix times the
+    # teaching days per weekday.
+    keys, periods, extra = [], [], []
+    for section, entry in timetables.items():
+        per_subject = {}
+        for day, subjects in entry["schedule"].items():
+            for s in subjects:
+                per_subject.setdefault(s, np.zeros(7, dtype=np.int64))[WEEKDAYS.index(day)] += 1
+        for s in sorted(per_subject):
+            keys.append((section, s))
+            periods.append(per_subject[s])
+            extra.append(int(entry["extra_classes"].get(s, 0)))
+    if not keys:
+        return pd.DataFrame()
+
+    periods = np.array(periods)
+    extra = np.array(extra)
+    till_days, full_days = map(np.array, teaching_day_totals(start, end, cutoff, holiday_dates))
+    total_sem = periods @ full_days + extra
+
+    report = pd.DataFrame(keys, columns=["Section", "Subject"])
+    report["Classes Should Have Completed Till Today"] = periods @ till_days + extra
+    report["Total Classes In Semester"] = total_sem
+    report["Extra Classes Required"] = periods.sum(axis=1) * SEMESTER_WEEKS - total_sem
+    for level in ATTENDANCE_LEVELS:
+        report[f"Absents for {level}%"] = total_sem - np.ceil(level / 100 * total_sem).astype(np.int64)
+    return report
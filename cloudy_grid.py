@@ -0,0 +1,153 @@
+# Bulk comparison of Cloudy saved continuum files from a model grid.
+#
+# A directory or zip of `save continuum` outputs is parsed in a thread pool
+# (cloudy_reader does the parsing and caches each file's arrays), one column
+# of every file is put on a common frequency grid, and the result is a single
+# (n_grid, n_models) array that graphaway_core's render_graph and
+# band_integrals work on directly.
+import os
+import shutil
+import tempfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+import array_cache
+from cloudy_reader import open_cloudy
+
+CONTINUUM_EXTENSIONS = (".con", ".cont", ".continuum", ".txt")
+RYD_TO_HZ = 3.28984196e15
+
+# Uploaded zips are extracted into UPLOAD_DIR/<content hash>, so the same
+# upload reuses one directory (and the reader's sidecars for its files) across
+# reruns and sessions. Extractions are evicted by UPLOAD_MAX_AGE and
+# UPLOAD_MAX_BYTES with array_cache's rule.
+UPLOAD_DIR = os.environ.get("CLOUDY_GRID_UPLOAD_DIR", os.path.join(tempfile.gettempdir(), "cloudy_grid_uploads"))
+UPLOAD_MAX_BYTES = 2 * 1024 ** 3
+UPLOAD_MAX_AGE = 24 * 3600
+
+def continuum_sources(source):
+    # [(model name, path)] for a directory, a zip path or an uploaded zip buffer
+    if isinstance(source, (str, os.PathLike)) and os.path.isdir(source):
+        names = sorted(n for n in os.listdir(source) if n.lower().endswith(CONTINUUM_EXTENSIONS))
+        return [(os.path.splitext(n)[0], os.path.join(source, n)) for n in names]
+
+    with zipfile.ZipFile(source) as archive:
+        members = sorted(m for m in archive.namelist()
+                         if m.lower().endswith(CONTINUUM_EXTENSIONS) and not m.endswith("/"))
+        extract_dir = os.path.join(os.path.realpath(UPLOAD_DIR), array_cache.content_digest(source).hexdigest())
+        # extractall() would quietly rewrite absolute and "../" names, but the
+        # paths read below are built from the names as given, so refuse them
+        paths = [os.path.realpath(os.path.join(extract_dir, m)) for m in members]
+        outside = [m for m, path in zip(members, paths) if os.path.commonpath([extract_dir, path]) != extract_dir]
+        if outside:
+            raise ValueError(f"zip members outside the archive: {', '.join(outside)}")
+        if os.path.isdir(extract_dir):
+            os.utime(extract_dir)
+        else:
+            # Extract next to the final name and move it into place, so a
+            # concurrent session never sees a half-extracted directory
+            os.makedirs(UPLOAD_DIR, exist_ok=True)
+            partial = tempfile.mkdtemp(dir=UPLOAD_DIR, prefix=".partial_")
+            archive.extractall(partial, members)
+            try:
+                os.rename(partial, extract_dir)
+            except OSError:
+                shutil.rmtree(partial, ignore_errors=True)   # another session got there first
+            evict_uploads()
+    return [(os.path.splitext(os.path.relpath(path, extract_dir))[0].replace(os.sep, "_"), path) for path in paths]
+
+def evict_uploads(max_bytes=UPLOAD_MAX_BYTES, max_age=UPLOAD_MAX_AGE):
+    if not os.path.isdir(UPLOAD_DIR):
+        return
+    entries = []
+    for name in os.listdir(UPLOAD_DIR):
+        path = os.path.join(UPLOAD_DIR, name)
+        if name.startswith(".partial_") or not os.path.isdir(path):
+            continue
+        size = sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files)
+        entries.append((os.stat(path).st_mtime, size, path))
+    array_cache.evict_lru(entries, max_bytes, max_age, lambda path: shutil.rmtree(path, ignore_errors=True))
+
+def read_continuum(path, column="total"):
+    # (nu, values) of the last iteration in one continuum file, sorted by nu
+    data = open_cloudy(path).continuum(-1)
+    if column not in data.columns:
+        raise ValueError(f"column '{column}' not in {list(data.columns)}")
+    nu = data["nu"].to_numpy()
+    order = np.argsort(nu, kind="stable")
+    return nu[order], data[column].to_numpy()[order]
+
+def interpolate_stack(xs, ys, grid):
+    # Linear interpolation of every (x, y) series onto `grid` at once, NaN outside
+    # each series' own range. The series are laid end to end on one axis, each
+    # shifted past the previous one, so a single searchsorted finds all brackets.
+    grid = np.asarray(grid, dtype=float)
+    lengths = np.array([len(x) for x in xs])
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    span = max(float(np.max(x)) for x in xs) - min(float(np.min(x)) for x in xs)
+    span = max(span, float(grid.max() - grid.min())) + 1.0
+    shift = np.arange(len(xs)) * span
+
+    flat_x = np.concatenate([np.asarray(x, dtype=float) + s for x, s in zip(xs, shift)])
+    flat_y = np.concatenate([np.asarray(y, dtype=float) for y in ys])
+    query = grid[None, :] + shift[:, None]                               # (n_series, n_grid)
+
+    i = np.searchsorted(flat_x, query, side="right") - 1
+    i = np.clip(i, starts[:, None], (starts + lengths - 2)[:, None])
+    x0, x1 = flat_x[i], flat_x[i + 1]
+    width = x1 - x0
+    frac = np.divide(query - x0, width, out=np.zeros_like(query), where=width > 0)
+    out = flat_y[i] + frac * (flat_y[i + 1] - flat_y[i])
+
+    lo = np.array([x[0] for x in xs])[:, None]
+    hi = np.array([x[-1] for x in xs])[:, None]
+    out[(grid[None, :] < lo) | (grid[None, :] > hi)] = np.nan
+    return out.T                                                         # (n_grid, n_series)
+
+def common_grid(xs, grid_points=None):
+    # The shared mesh when every file uses the same frequencies (the usual case
+    # for a Cloudy grid), otherwise a log-spaced grid over the overlapping range
+    if all(len(x) == len(xs[0]) and np.array_equal(x, xs[0]) for x in xs[1:]):
+        return np.asarray(xs[0], dtype=float)
+    lo = max(float(x[x > 0].min()) for x in xs)
+    hi = min(float(x.max()) for x in xs)
+    if not lo < hi:
+        raise ValueError("the continuum files have no frequency range in common")
+    return np.logspace(np.log10(lo), np.log10(hi), grid_points or max(len(x) for x in xs))
+
+def load_continuum_grid(sources, column="total", workers=None, grid_points=None, progress=None):
+    # Returns (names, grid, Y, errors); Y is (len(grid), len(names)) and errors
+    # maps model name -> message for files that could not be read
+    series, errors = {}, {}
+    with ThreadPoolExecutor(max_workers=workers or min(32, (os.cpu_count() or 1) + 4)) as pool:
+        futures = {pool.submit(read_continuum, path, column): name for name, path in sources}
+        for done, future in enumerate(as_completed(futures), start=1):
+            name = futures[future]
+            try:
+                series[name] = future.result()
+            except Exception as e:
+                errors[name] = str(e)
+            if progress:
+                progress(done / len(futures))
+
+    names = [name for name, _ in sources if name in series]
+    if not names:
+        return [], np.empty(0), np.empty((0, 0)), errors
+    xs = [series[n][0] for n in names]
+    ys = [series[n][1] for n in names]
+    grid = common_grid(xs, grid_points)
+    if all(len(x) == len(grid) and np.array_equal(x, grid) for x in xs):
+        Y = np.column_stack(ys)
+    else:
+        # Interpolate in log(nu), where Cloudy's mesh is close to uniform
+        Y = interpolate_stack([np.log10(np.clip(x, 1e-300, None)) for x in xs], ys, np.log10(grid))
+    return names, grid, Y, errors
+
+def stack_frame(names, grid, Y, x_column="nu"):
+    # The stack as a DataFrame with one column per model, for render_graph
+    frame = pd.DataFrame(Y, columns=names)
+    frame.insert(0, x_column, grid)
+    return frame
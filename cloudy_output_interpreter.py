@@ -1,16 +1,25 @@
 import streamlit as st
-import runpy
 import os
+import pandas as pd
+from page_registry import PageRegistry
+import perf
 
 st.set_page_config(page_title="My Streamlit App", layout="wide")
+profile = perf.begin("Cloudy Interpreter")
 
 # Paths to your scripts
 PAGES = {
     "Home": {"path": None, "logo": "🏠"},
     "Save Continuum File": {"path": "pages/save_continuum_file.py", "logo": "💾"},
-    "Cloudy Out File": {"path": "pages/cloudy_out_file.py", "logo": "☁️"}
+    "Cloudy Out File": {"path": "pages/cloudy_out_file.py", "logo": "☁️"},
+    "Continuum Grid": {"path": "pages/continuum_grid.py", "logo": "📚"}
 }
 
+# Compiled pages and their cached resources, shared by every rerun and session
+@st.cache_resource
+def page_registry():
+    return PageRegistry()
+
 if "page" not in st.session_state:
     st.session_state.page = "Home"
 
@@ -27,7 +36,23 @@ if st.session_state.page == "Home":
 else:
     page_path = PAGES[st.session_state.page]["path"]
     if page_path and os.path.exists(page_path):
-        # Execute the page script just like running `streamlit run <file>`
-        runpy.run_path(page_path, run_name="__main__")
+        # Execute the page script just like running `streamlit run <file>`,
+        # compiling it only when the file changed since the last visit. A page
+        # that ends early with st.stop() still has its rerun profile recorded.
+        try:
+            with perf.span(st.session_state.page):
+                page_registry().run(page_path)
+        finally:
+            perf.end(profile)
+            profile = None
     else:
         st.error(f"Page not found: {page_path}")
+
+with st.sidebar.expander("⏱ Page load times"):
+    load_times = page_registry().report()
+    if load_times:
+        st.dataframe(pd.DataFrame(load_times), hide_index=True)
+    else:
+        st.write("No pages visited yet.")
+
+perf.end(profile)
@@ -0,0 +1,199 @@
+# Reader for Cloudy main outputs (.out) and saved continuum files.
+#
+# A file is scanned once with a single regex pass over a memory map, which
+# yields an index of byte offsets for every section:
+#   iteration:  "Start Iteration Number N" up to the next iteration
+#   zone:       a "#### N" zone header up to the next header of any kind
+#   lines:      an "Emergent/Intrinsic line intensities" list up to its blank line
+#   continuum:  one iteration of a `save continuum` file ("#Cont  nu ..." header,
+#               iterations separated by "#####" lines)
+# Sections are served from the map without reading the rest of the file. Numeric
+# sections are parsed once into .npy sidecars in CLOUDY_CACHE_DIR (array_cache,
+# evicted like GraphAway's dataset cache) and returned as read-only
+# memory-mapped views afterwards.
+#
+#   python cloudy_reader.py model.out      # print the section index
+import functools
+import hashlib
+import io
+import mmap
+import os
+import re
+import sys
+import tempfile
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+import array_cache
+
+CLOUDY_CACHE_DIR = os.environ.get("CLOUDY_CACHE_DIR", os.path.join(tempfile.gettempdir(), "cloudy_cache"))
+CLOUDY_CACHE_MAX_BYTES = 2 * 1024 ** 3
+CLOUDY_CACHE_MAX_AGE = 24 * 3600
+
+Section = namedtuple("Section", ["kind", "label", "iteration", "start", "end"])
+
+HEADER = re.compile(
+    rb"^(?:"
+    rb"(?P<iteration>[ \t]*Start Iteration Number[ \t]+(?P<iteration_n>\d+))"
+    rb"|(?P<zone>[ \t]*####[ \t]+(?P<zone_n>\d+)[ \t])"
+    rb"|(?P<lines>[ \t]*(?P<line_kind>Emergent|Intrinsic) line intensities)"
+    rb"|(?P<cont_header>#[^\n]*?\bnu\b[^\n]*)"
+    rb"|(?P<separator>#{10,})"
+    rb")", re.M)
+NON_BLANK = re.compile(rb"\S")
+BLANK_LINE = re.compile(rb"\n[ \t]*\r?\n")
+
+# One emission line entry: 4-character label, wavelength with unit, log flux, relative intensity
+LINE_ENTRY = re.compile(
+    rb"(?P<label>[A-Za-z][A-Za-z0-9 +\-]{3})[ \t]+(?P<wavelength>\d+(?:\.\d+)?[AmMc]?)"
+    rb"[ \t]+(?P<log_flux>-?\d+\.\d+)[ \t]+(?P<intensity>\d+\.\d+(?:[eE][+\-]?\d+)?)")
+LINE_DTYPE = np.dtype([("label", "U4"), ("wavelength", "U12"), ("log_flux", "f8"), ("intensity", "f8")])
+
+class CloudyFile:
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+        stat = os.stat(self.path)
+        self.size, self.mtime = stat.st_size, stat.st_mtime_ns
+        with open(self.path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b""
+        self.continuum_columns = []
+        self.sections = self._scan()
+
+    def _line_end(self, pos):
+        end = self.map.find(b"\n", pos)
+        return self.size if end < 0 else end + 1
+
+    def _scan(self):
+        # lastgroup is the outermost alternative that matched
+        headers = [(m.lastgroup, m) for m in HEADER.finditer(self.map)]
+        sections = []
+        iteration = 1
+        open_zone = open_iteration = open_continuum = None
+        continuum_count = 0
+
+        def close(section, end):
+            if section is not None:
+                sections.append(section._replace(end=end))
+
+        for kind, m in headers:
+            pos = m.start()
+            if kind == "iteration":
+                close(open_zone, pos)
+                close(open_iteration, pos)
+                iteration = int(m.group("iteration_n"))
+                open_zone = None
+                open_iteration = Section("iteration", f"iteration {iteration}", iteration, pos, None)
+            elif kind == "zone":
+                close(open_zone, pos)
+                open_zone = Section("zone", f"zone {int(m.group('zone_n'))}", iteration, pos, None)
+            elif kind == "lines":
+                close(open_zone, pos)
+                open_zone = None
+                start = self._line_end(pos)
+                blank = BLANK_LINE.search(self.map, start)
+                end = blank.start() + 1 if blank else self.size
+                sections.append(Section("lines", f"{m.group('line_kind').decode().lower()} lines",
+                                        iteration, start, end))
+            elif kind == "cont_header":
+                if not self.continuum_columns:
+                    # "#Cont  nu\tincident\t..." -> ["nu", "incident", ...]
+                    columns = m.group(0).decode().lstrip("#").strip().split("\t")
+                    self.continuum_columns = [columns[0].split()[-1]] + [c.strip() for c in columns[1:]]
+                close(open_continuum, pos)
+                continuum_count += 1
+                open_continuum = Section("continuum", f"continuum {continuum_count}", continuum_count,
+                                         self._line_end(pos), None)
+            elif kind == "separator":
+                close(open_zone, pos)
+                open_zone = None
+                if self.continuum_columns:
+                    close(open_continuum, pos)
+                    continuum_count += 1
+                    open_continuum = Section("continuum", f"continuum {continuum_count}", continuum_count,
+                                             self._line_end(pos), None)
+        close(open_zone, self.size)
+        close(open_iteration, self.size)
+        close(open_continuum, self.size)
+        # A trailing separator leaves an empty last continuum block
+        sections = [s for s in sections if s.kind != "continuum" or NON_BLANK.search(self.map, s.start, s.end)]
+        sections.sort(key=lambda s: (s.start, s.kind != "iteration"))
+        return sections
+
+    def find(self, kind, label=None, iteration=None):
+        # Sections of one kind, optionally narrowed by label or iteration
+        return [s for s in self.sections if s.kind == kind
+                and (label is None or s.label == label)
+                and (iteration is None or s.iteration == iteration)]
+
+    def raw(self, section):
+        # Zero-copy view of a section's bytes
+        return memoryview(self.map)[section.start:section.end]
+
+    def text(self, section):
+        return bytes(self.raw(section)).decode("utf-8", errors="replace")
+
+    # ------------------ Numeric sections (memory-mapped sidecars) ------------------
+    def _sidecar(self, section):
+        return hashlib.blake2b(f"{self.path}|{self.size}|{self.mtime}|{section.start}|{section.end}".encode(),
+                               digest_size=20).hexdigest()
+
+    def _cached_array(self, section, parse):
+        key = self._sidecar(section)
+        cached = array_cache.load(CLOUDY_CACHE_DIR, key)
+        if cached is None:
+            values, columns = parse(self.raw(section))
+            array_cache.store(CLOUDY_CACHE_DIR, key, values, columns, CLOUDY_CACHE_MAX_BYTES, CLOUDY_CACHE_MAX_AGE)
+            # Served from the map when it fits the cache; the parsed copy only if evicted at once
+            cached = array_cache.load(CLOUDY_CACHE_DIR, key) or (values, columns)
+        return cached
+
+    def _parse_continuum(self, data):
+        frame = pd.read_csv(io.BytesIO(data), sep="\t", header=None, comment="#")
+        names = self.continuum_columns + [f"col{i}" for i in range(len(self.continuum_columns), frame.shape[1])]
+        frame.columns = names[:frame.shape[1]]
+        numeric = frame.select_dtypes("number")
+        return np.ascontiguousarray(numeric.to_numpy(dtype=np.float64)), [str(c) for c in numeric.columns]
+
+    def continuum(self, section=-1):
+        # One continuum block as a DataFrame over a read-only memory map.
+        # `section` is a Section or an index into the continuum blocks (-1 = last).
+        if not isinstance(section, Section):
+            section = self.find("continuum")[section]
+        values, columns = self._cached_array(section, self._parse_continuum)
+        return pd.DataFrame(values, columns=columns, copy=False)
+
+    def line_list(self, section=-1):
+        # A line list as a structured array (label, wavelength, log_flux, intensity)
+        if not isinstance(section, Section):
+            section = self.find("lines")[section]
+
+        def parse(data):
+            entries = [(m["label"].decode().strip(), m["wavelength"].decode(),
+                        float(m["log_flux"]), float(m["intensity"]))
+                       for m in LINE_ENTRY.finditer(data)]
+            return np.array(entries, dtype=LINE_DTYPE), list(LINE_DTYPE.names)
+
+        values, _ = self._cached_array(section, parse)
+        return values
+
+    def close(self):
+        if isinstance(self.map, mmap.mmap):
+            self.map.close()
+
+# One index per (file, size, mtime): re-opening an unchanged file skips the scan
+@functools.lru_cache(maxsize=64)
+def _open_cloudy(path, size, mtime):
+    return CloudyFile(path)
+
+def open_cloudy(path):
+    stat = os.stat(path)
+    return _open_cloudy(os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+
+if __name__ == "__main__":
+    for path in sys.argv[1:]:
+        cloudy = open_cloudy(path)
+        print(f"{path}: {len(cloudy.sections)} sections")
+        for s in cloudy.sections:
+            print(f"  {s.kind:<10} {s.label:<20} iteration {s.iteration:<3} bytes {s.start}-{s.end}")
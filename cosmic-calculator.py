@@ -1,88 +1,13 @@
 import streamlit as st
-from math import *
-
-# Function to perform the cosmological calculations
-def cosmology_calculator(z, H0, WM, WV):
-    WR = 0.0
-    WK = 0.0
-    c = 299792.458  # velocity of light in km/sec
-    Tyr = 977.8     # coefficient for converting 1/H into Gyr
-    n = 1000        # number of points in integrals
-
-    h = H0 / 100.0
-    WR = 4.165E-5 / (h * h)  # includes 3 massless neutrino species, T0 = 2.72528
-    WK = 1 - WM - WR - WV
-    az = 1.0 / (1.0 + z)
-    age = 0.0
-    zage = 0.1
-    DTT = 0.5
-    DCMR = 0.0
-
-    # Perform integral calculations for age and distances
-    for i in range(n):
-        a = az * (i + 0.5) / n
-        adot = sqrt(WK + (WM / a) + (WR / (a * a)) + (WV * a * a))
-        age = age + 1.0 / adot
-
-    zage = az * age / n
-    zage_Gyr = (Tyr / H0) * zage
-    DTT = 0.0
-    DCMR = 0.0
-
-    # Comoving distance calculation
-    for i in range(n):
-        a = az + (1 - az) * (i + 0.5) / n
-        adot = sqrt(WK + (WM / a) + (WR / (a * a)) + (WV * a * a))
-        DTT = DTT + 1.0 / adot
-        DCMR = DCMR + 1.0 / (a * adot)
-
-    DTT = (1.0 - az) * DTT / n
-    DCMR = (1.0 - az) * DCMR / n
-    age = DTT + zage
-    age_Gyr = age * (Tyr / H0)
-    DTT_Gyr = (Tyr / H0) * DTT
-    DCMR_Gyr = (Tyr / H0) * DCMR
-    DCMR_Mpc = (c / H0) * DCMR
-
-    # Angular size distance and luminosity distance
-    ratio = 1.0
-    x = sqrt(abs(WK)) * DCMR
-    if x > 0.1:
-        if WK > 0:
-            ratio = 0.5 * (exp(x) - exp(-x)) / x
-        else:
-            ratio = sin(x) / x
-    else:
-        y = x * x
-        if WK < 0:
-            y = -y
-        ratio = 1.0 + y / 6.0 + y * y / 120.0
-
-    DCMT = ratio * DCMR
-    DA = az * DCMT
-    DA_Mpc = (c / H0) * DA
-    kpc_DA = DA_Mpc / 206.264806
-    DA_Gyr = (Tyr / H0) * DA
-    DL = DA / (az * az)
-    DL_Mpc = (c / H0) * DL
-    DL_Gyr = (Tyr / H0) * DL
-
-    # Volume calculation
-    VCM = ratio * DCMR * DCMR * DCMR / 3.0
-    V_Gpc = 4.0 * pi * ((0.001 * c / H0) ** 3) * VCM
-
-    return {
-        "age_Gyr": age_Gyr,
-        "zage_Gyr": zage_Gyr,
-        "DCMR_Mpc": DCMR_Mpc,
-        "DCMR_Gyr": DCMR_Gyr,
-        "DA_Mpc": DA_Mpc,
-        "DA_Gyr": DA_Gyr,
-        "kpc_DA": kpc_DA,
-        "DL_Mpc": DL_Mpc,
-        "DL_Gyr": DL_Gyr,
-        "V_Gpc": V_Gpc
-    }
+import os
+import tempfile
+import numpy as np
+import matplotlib.pyplot as plt
+from cosmology import cached_cosmology_calculator, INTEGRATION_METHODS
+import cosmology
+import perf
+
+profile = perf.begin("Cosmology Calculator")
 
 # Displaying Formulas
 st.title('Cosmology Calculator')
@@ -93,6 +18,14 @@ H0 = st.number_input('Hubble Constant (H₀)', min_value=69.600, value=75.0, ste
 WM = st.number_input('Omega Matter (Ωₘ)', min_value=0.000, max_value=1.0, value=0.286, step=0.01)
 WV = st.number_input('Omega Vacuum (Ωλ)', min_value=0.000, max_value=1.0, value=0.714, step=0.01)
 
+# Integration backend
+with st.expander("Integration settings"):
+    method = st.selectbox("Integration method", INTEGRATION_METHODS)
+    rtol = st.number_input("Relative tolerance (Gauss–Kronrod)", min_value=1e-14, max_value=1e-2, value=1e-8, format="%.0e")
+    order = st.number_input("Nodes (Gauss–Legendre)", min_value=4, max_value=512, value=32, step=4)
+    radiation = st.checkbox("Include radiation (Ωᵣ)", value=True,
+                            help="Without radiation, flat models (Ωₘ + Ωλ = 1) use the closed-form solution.")
+
 # Displaying formulas and their meanings using st.columns
 st.subheader('Formulas Used:')
 col1, col2 = st.columns([3, 1])
@@ -114,7 +47,10 @@ with col2:
 
 # Calculation button
 if st.button('Calculate'):
-    results = cosmology_calculator(z, H0, WM, WV)
+    # Repeated inputs (reruns, other users on the same cosmology) come from the shared cache
+    with perf.span("cosmology_calculator"):
+        results = cached_cosmology_calculator(z, H0, WM, WV, method=method, rtol=rtol, order=int(order),
+                                             radiation=radiation)
 
     # Display results using st.info and st.success for clarity
     st.info("### Cosmology Results")
@@ -125,6 +61,93 @@ if st.button('Calculate'):
     st.success(f"**Scale (kpc/”)**: {results['kpc_DA']:.2f} kpc/”")
     st.success(f"**Luminosity Distance (Dₗ)**: {results['DL_Mpc']:.1f} Mpc or {results['DL_Gyr']:.1f} Gly")
     st.success(f"**Comoving Volume (V)**: {results['V_Gpc']:.1f} Gpc³")
+    st.caption(f"Integration: {results['method']}, estimated relative error {results['rel_error']:.1e}, "
+               f"{results['n_evals']} integrand evaluations")
+    stats = cosmology.RESULT_CACHE.stats()
+    st.caption(f"Result cache: {stats['hits']} hits, {stats['misses']} misses, {stats['size']}/{stats['maxsize']} entries")
+
+# ------------------ Redshift Range ------------------
+st.header("Redshift Range")
+st.write("Tabulate every quantity over a range of z for the cosmology above, plot it and export the table.")
+
+c1, c2, c3, c4 = st.columns(4)
+z_from = c1.number_input("z from", min_value=0.0, value=0.0, key="range_z_lo")
+z_to = c2.number_input("z to", min_value=0.0, value=10.0, key="range_z_hi")
+z_steps = c3.number_input("Points", min_value=2, value=500, key="range_z_n")
+log_spacing = c4.checkbox("Log spacing in (1+z)", value=True)
+
+quantity_labels = {
+    "Luminosity distance (Mpc)": "DL_Mpc",
+    "Angular size distance (Mpc)": "DA_Mpc",
+    "Comoving radial distance (Mpc)": "DCMR_Mpc",
+    "Age at z (Gyr)": "zage_Gyr",
+    "Scale (kpc/”)": "kpc_DA",
+    "Comoving volume (Gpc³)": "V_Gpc",
+}
+plotted = st.multiselect("Quantities to plot", list(quantity_labels), default=["Luminosity distance (Mpc)"])
+
+if st.button("Tabulate range"):
+    if log_spacing:
+        z_values = np.geomspace(1 + z_from, 1 + z_to, int(z_steps)) - 1
+    else:
+        z_values = np.linspace(z_from, z_to, int(z_steps))
+    with perf.span("cosmology_over_z"):
+        table = cosmology.cosmology_over_z(z_values, H0, WM, WV, radiation=radiation)
+
+    for label in plotted:
+        with perf.span(f"plot {quantity_labels[label]}"):
+            fig, ax = plt.subplots()
+            ax.plot(table["z"], table[quantity_labels[label]])
+            ax.set_xlabel("Redshift (z)")
+            ax.set_ylabel(label)
+            ax.set_title(f"{label} vs z")
+            if log_spacing:
+                ax.set_xscale("symlog", linthresh=0.1)
+            ax.grid(True)
+            st.pyplot(fig)
+
+    st.dataframe(table)
+    st.download_button("Download table (CSV)", table.to_csv(index=False), "cosmology_vs_z.csv", "text/csv")
+
+# ------------------ Parameter Sweep ------------------
+st.header("Parameter Sweep")
+st.write("Evaluate every combination of H₀, Ωₘ and Ωλ over a redshift grid. "
+         "The grid is split across worker processes and written to disk block by block.")
+
+def grid_inputs(label, lo, hi, n, key):
+    c1, c2, c3 = st.columns(3)
+    start = c1.number_input(f"{label} from", value=lo, key=f"{key}_lo", format="%.4f")
+    stop = c2.number_input(f"{label} to", value=hi, key=f"{key}_hi", format="%.4f")
+    steps = c3.number_input(f"{label} steps", min_value=1, value=n, key=f"{key}_n")
+    return np.linspace(start, stop, int(steps))
+
+H0_grid = grid_inputs("H₀", 60.0, 80.0, 5, "sweep_H0")
+WM_grid = grid_inputs("Ωₘ", 0.2, 0.4, 5, "sweep_WM")
+WV_grid = grid_inputs("Ωλ", 0.6, 0.8, 5, "sweep_WV")
+z_grid = grid_inputs("z", 0.0, 5.0, 100, "sweep_z")
+c1, c2 = st.columns(2)
+workers = c1.number_input("Worker processes", min_value=1, value=os.cpu_count() or 1)
+output_format = c2.selectbox("Output format", ["CSV", "Parquet"])
+st.caption(f"{len(H0_grid) * len(WM_grid) * len(WV_grid):,} cosmologies × {len(z_grid):,} redshifts")
+
+if st.button("Run sweep"):
+    path = os.path.join(tempfile.mkdtemp(), "cosmology_sweep." + output_format.lower())
+    bar = st.progress(0.0)
+    status = st.empty()
+
+    def report(done, total, rate):
+        bar.progress(done / total)
+        status.caption(f"{done:,} / {total:,} rows, {rate:,.0f} rows/s")
+
+    with perf.span("cosmology_sweep"):
+        rows = cosmology.cosmology_sweep_to_file(path, H0_grid, WM_grid, WV_grid, z_grid,
+                                                 workers=int(workers), progress=report)
+    st.success(f"Sweep finished: {rows:,} rows")
+    with open(path, "rb") as f:
+        st.download_button(f"Download results ({output_format})", f, os.path.basename(path))
+
 #--------
 st.header("References")
 st.markdown('[Astro.ucla.edu](https://www.astro.ucla.edu/~wright/CC.python)')
+
+perf.end(profile)
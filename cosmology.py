@@ -0,0 +1,589 @@
+import json
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from math import sqrt, exp, sin, pi
+
+import numpy as np
+import pandas as pd
+from scipy.integrate import quad_vec
+from scipy.interpolate import CubicHermiteSpline
+from scipy.special import hyp2f1
+
+# ------------------ Constants ------------------
+C_LIGHT = 299792.458  # velocity of light in km/sec
+TYR = 977.8           # coefficient for converting 1/H into Gyr
+WR_COEFF = 4.165E-5   # radiation density * h^2, 3 massless neutrino species, T0 = 2.72528
+
+RESULT_KEYS = ["age_Gyr", "zage_Gyr", "DCMR_Mpc", "DCMR_Gyr", "DA_Mpc", "DA_Gyr",
+               "kpc_DA", "DL_Mpc", "DL_Gyr", "V_Gpc"]
+
+# ------------------ Integration backends ------------------
+INTEGRATION_METHODS = ["gauss-kronrod", "gauss-legendre", "midpoint"]
+
+def _gauss_legendre(f, lo, hi, order):
+    t, w = np.polynomial.legendre.leggauss(order)
+    a = lo + (hi - lo) * 0.5 * (t + 1.0)
+    return (hi - lo) * 0.5 * (f(a) @ w)
+
+def _midpoint(f, lo, hi, n):
+    a = lo + (hi - lo) * (np.arange(n) + 0.5) / n
+    return (hi - lo) * f(a).sum(axis=-1) / n
+
+# Integrate a vector-valued integrand f(a) -> array of shape (k,) (or (k, m) for
+# an array of m points) over [lo, hi]. Returns (values, rel_error, n_evals),
+# where rel_error is the estimated error relative to the largest component.
+#   gauss-kronrod:  adaptive 21-point Gauss-Kronrod (QUADPACK), refined until rtol
+#   gauss-legendre: fixed `order` nodes; error is |G(order) - G(order/2)|, a
+#                   conservative estimate
+#   midpoint:       the original n-step rule; error from Richardson against n/2
+def integrate(f, lo, hi, method="gauss-kronrod", rtol=1e-8, order=32, n=1000):
+    if hi <= lo:
+        return np.zeros(len(f(np.array([hi])))), 0.0, 0
+    if method == "gauss-kronrod":
+        values, abserr, info = quad_vec(f, lo, hi, epsabs=0, epsrel=rtol, norm='max', full_output=True)
+        n_evals = info.neval
+    elif method == "gauss-legendre":
+        values = _gauss_legendre(f, lo, hi, order)
+        abserr = np.max(np.abs(values - _gauss_legendre(f, lo, hi, order // 2)))
+        n_evals = order + order // 2
+    elif method == "midpoint":
+        values = _midpoint(f, lo, hi, n)
+        abserr = np.max(np.abs(values - _midpoint(f, lo, hi, n // 2))) / 3.0
+        n_evals = n + n // 2
+    else:
+        raise ValueError(f"Unknown integration method: {method}")
+    scale = np.max(np.abs(values))
+    return values, (abserr / scale if scale > 0 else 0.0), n_evals
+
+# ------------------ Flat ΛCDM closed form ------------------
+# |1 - WM - WV| below this counts as flat
+FLAT_TOL = 1e-9
+ANALYTIC_METHOD = "analytic (flat ΛCDM)"
+
+# Closed-form integrals for a flat universe of matter and Λ only, in units of
+# 1/H0 and c/H0 (x = 1 + z, s = WV/WM):
+#   t(a)    = 2 / (3 sqrt(WV)) asinh(sqrt(s) a^1.5)      (2/3 a^1.5 / sqrt(WM) for WV = 0)
+#   DCMR(z) = [F(1 + z) - F(1)] / sqrt(WM),  F(x) = -2 x^-0.5 2F1(1/2, 1/6; 7/6; -s x^-3)
+# Returns (zage, DTT, DCMR).
+def flat_lcdm_integrals(z, WM, WV):
+    az = 1.0 / (1.0 + z)
+    if WV > 0:
+        t = lambda a: 2.0 / (3.0 * sqrt(WV)) * np.arcsinh(sqrt(WV / WM) * a ** 1.5)
+    else:
+        t = lambda a: 2.0 / 3.0 * a ** 1.5 / sqrt(WM)
+    F = lambda x: -2.0 / np.sqrt(x) * hyp2f1(0.5, 1.0 / 6.0, 7.0 / 6.0, -(WV / WM) / x ** 3)
+    zage = t(az)
+    return zage, t(1.0) - zage, (F(1.0 + z) - F(1.0)) / sqrt(WM)
+
+# Whether the closed form applies: flat, WM > 0, WV >= 0, and radiation either
+# disabled or too small to matter at this z (relative effect on the integrands
+# is about WR / (WM a), compared against rtol). Returns the error estimate of
+# the closed form, or None if the general quadrature is needed.
+def analytic_error(z, WM, WV, WR, radiation, rtol):
+    if WM <= 0 or WV < 0 or abs(1 - WM - WV) > FLAT_TOL:
+        return None
+    if not radiation:
+        return 0.0
+    error = WR * (1.0 + z) / WM
+    return error if error <= rtol else None
+
+# Function to perform the cosmological calculations. `method` selects the
+# integration backend (see integrate); "midpoint" with n = 1000 reproduces the
+# original calculator. `radiation=False` drops the Ωᵣ term. Flat matter + Λ
+# models (see analytic_error) are evaluated in closed form instead when
+# `analytic` is set. The result also reports the path used, the worst
+# estimated relative error of the integrals and the number of integrand calls.
+def cosmology_calculator(z, H0, WM, WV, method="midpoint", rtol=1e-8, order=32, n=1000,
+                         radiation=True, analytic=True):
+    h = H0 / 100.0
+    WR = WR_COEFF / (h * h) if radiation else 0.0
+    WK = 1 - WM - WR - WV
+    az = 1.0 / (1.0 + z)
+
+    closed_form_error = analytic_error(z, WM, WV, WR, radiation, rtol) if analytic else None
+    if closed_form_error is not None:
+        zage, DTT, DCMR = flat_lcdm_integrals(z, WM, WV)
+        return _finish(z, H0, 1 - WM - WV, zage, DTT, DCMR, ANALYTIC_METHOD, closed_form_error, 0)
+
+    # Integrands 1/adot (time) and 1/(a*adot) (comoving distance)
+    def integrand(a):
+        adot = np.sqrt(WK + (WM / a) + (WR / (a * a)) + (WV * a * a))
+        return np.array([1.0 / adot, 1.0 / (a * adot)])
+
+    # Age at redshift z (time integrand only; the distance one is not needed here)
+    (zage,), err_young, evals_young = integrate(lambda a: integrand(a)[:1], 0.0, az, method, rtol, order, n)
+
+    # Lookback time and comoving distance
+    (DTT, DCMR), err_old, evals_old = integrate(integrand, az, 1.0, method, rtol, order, n)
+
+    return _finish(z, H0, WK, zage, DTT, DCMR, method, max(err_young, err_old), evals_young + evals_old)
+
+# Distances, volume and unit conversions from the dimensionless integrals
+def _finish(z, H0, WK, zage, DTT, DCMR, method, rel_error, n_evals):
+    c = C_LIGHT
+    Tyr = TYR
+    az = 1.0 / (1.0 + z)
+    zage_Gyr = (Tyr / H0) * zage
+    age = DTT + zage
+    age_Gyr = age * (Tyr / H0)
+    DCMR_Gyr = (Tyr / H0) * DCMR
+    DCMR_Mpc = (c / H0) * DCMR
+
+    # Angular size distance and luminosity distance
+    ratio = 1.0
+    x = sqrt(abs(WK)) * DCMR
+    if x > 0.1:
+        if WK > 0:
+            ratio = 0.5 * (exp(x) - exp(-x)) / x
+        else:
+            ratio = sin(x) / x
+    else:
+        y = x * x
+        if WK < 0:
+            y = -y
+        ratio = 1.0 + y / 6.0 + y * y / 120.0
+
+    DCMT = ratio * DCMR
+    DA = az * DCMT
+    DA_Mpc = (c / H0) * DA
+    kpc_DA = DA_Mpc / 206.264806
+    DA_Gyr = (Tyr / H0) * DA
+    DL = DA / (az * az)
+    DL_Mpc = (c / H0) * DL
+    DL_Gyr = (Tyr / H0) * DL
+
+    # Volume calculation
+    VCM = ratio * DCMR * DCMR * DCMR / 3.0
+    V_Gpc = 4.0 * pi * ((0.001 * c / H0) ** 3) * VCM
+
+    return {
+        "age_Gyr": age_Gyr,
+        "zage_Gyr": zage_Gyr,
+        "DCMR_Mpc": DCMR_Mpc,
+        "DCMR_Gyr": DCMR_Gyr,
+        "DA_Mpc": DA_Mpc,
+        "DA_Gyr": DA_Gyr,
+        "kpc_DA": kpc_DA,
+        "DL_Mpc": DL_Mpc,
+        "DL_Gyr": DL_Gyr,
+        "V_Gpc": V_Gpc,
+        "method": method,
+        "rel_error": rel_error,
+        "n_evals": n_evals
+    }
+
+# ------------------ Batch (vectorized) mode ------------------
+# Gauss-Legendre nodes used for all three integrals. Largest relative
+# differences measured against the scalar 1000-step midpoint path, over 244
+# redshifts from 1e-3 to 1000 in flat, open, closed and Einstein-de Sitter models:
+#
+#                          z <= 10   z <= 100   z <= 1000
+#   age_Gyr, zage_Gyr      4e-6      2e-6       2e-6
+#   DCMR_*                 7e-7      1.5e-5     2.8e-4
+#   DA_*, kpc_DA, DL_*     1.1e-6    3.2e-5     6.6e-4
+#   V_Gpc                  2.4e-6    6.1e-5     1.2e-3
+#
+# Nearly all of it is the midpoint sum's error: against an adaptive
+# Gauss-Kronrod reference (rtol 1e-12) the batch results are within 5e-7 for
+# z <= 100 and within 4.4e-6 (DCMR), 8.8e-6 (DA, DL) and 1.6e-5 (V_Gpc) at z = 1000.
+BATCH_NODES = 64
+# Redshifts evaluated per chunk; bounds the (chunk x nodes) temporaries to a few MB.
+BATCH_CHUNK = 16384
+
+def _adot(a, WK, WM, WR, WV):
+    return np.sqrt(WK + (WM / a) + (WR / (a * a)) + (WV * a * a))
+
+def _curvature_ratio(x, WK):
+    # sinh(x)/x for open, sin(x)/x for closed, Taylor series for small x
+    y = x * x
+    y = np.where(WK < 0, -y, y)
+    series = 1.0 + y / 6.0 + y * y / 120.0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        exact = np.where(WK > 0, np.sinh(x) / x, np.sin(x) / x)
+    return np.where(x > 0.1, exact, series)
+
+def _derived_quantities(z, H0, WK, zage, DTT, DCMR):
+    # Same post-processing as cosmology_calculator, applied elementwise
+    az = 1.0 / (1.0 + z)
+    c, Tyr = C_LIGHT, TYR
+    age = DTT + zage
+    ratio = _curvature_ratio(np.sqrt(np.abs(WK)) * DCMR, WK)
+    DA = az * ratio * DCMR
+    DA_Mpc = (c / H0) * DA
+    DL = DA / (az * az)
+    return {
+        "age_Gyr": (Tyr / H0) * age,
+        "zage_Gyr": (Tyr / H0) * zage,
+        "DCMR_Mpc": (c / H0) * DCMR,
+        "DCMR_Gyr": (Tyr / H0) * DCMR,
+        "DA_Mpc": DA_Mpc,
+        "DA_Gyr": (Tyr / H0) * DA,
+        "kpc_DA": DA_Mpc / 206.264806,
+        "DL_Mpc": (c / H0) * DL,
+        "DL_Gyr": (Tyr / H0) * DL,
+        "V_Gpc": 4.0 * np.pi * ((0.001 * c / H0) ** 3) * ratio * DCMR ** 3 / 3.0,
+    }
+
+# Array version of cosmology_calculator. z, H0, WM and WV may be scalars or
+# arrays of any broadcast-compatible shape; returns a dict of arrays with the
+# same keys as the scalar path (pass it to pd.DataFrame for a table).
+def cosmology_calculator_batch(z, H0=69.6, WM=0.286, WV=0.714, nodes=BATCH_NODES, chunk=BATCH_CHUNK):
+    z, H0, WM, WV = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (z, H0, WM, WV)))
+    shape = z.shape
+    z, H0, WM, WV = (v.ravel() for v in (z, H0, WM, WV))
+
+    t, w = np.polynomial.legendre.leggauss(nodes)
+    t = 0.5 * (t + 1.0)   # map nodes from [-1, 1] to [0, 1]
+    w = 0.5 * w
+
+    results = {key: np.empty(z.size) for key in RESULT_KEYS}
+    for start in range(0, z.size, chunk):
+        sl = slice(start, start + chunk)
+        zc, H0c = z[sl], H0[sl]
+        h = H0c / 100.0
+        WR = (WR_COEFF / (h * h))[:, None]
+        WMc, WVc = WM[sl][:, None], WV[sl][:, None]
+        WK = 1 - WMc - WR - WVc
+        az = (1.0 / (1.0 + zc))[:, None]
+
+        # age at z: integral of da/adot over [0, az]
+        a = az * t
+        zage = az[:, 0] * (w / _adot(a, WK, WMc, WR, WVc)).sum(axis=1)
+
+        # lookback time and comoving distance: integrals over [az, 1]
+        a = az + (1.0 - az) * t
+        adot = _adot(a, WK, WMc, WR, WVc)
+        DTT = (1.0 - az[:, 0]) * (w / adot).sum(axis=1)
+        DCMR = (1.0 - az[:, 0]) * (w / (a * adot)).sum(axis=1)
+
+        for key, value in _derived_quantities(zc, H0c, WK[:, 0], zage, DTT, DCMR).items():
+            results[key][sl] = value
+
+    return {key: value.reshape(shape) for key, value in results.items()}
+
+# ------------------ Redshift-range tabulation ------------------
+# Nodes per step, and the widest step in ln(1+z), of the running integrals
+RANGE_NODES = 8
+RANGE_MAX_STEP = 0.05
+
+# All quantities for a list of redshifts in one incremental sweep: the
+# integrals are accumulated step by step from z_i to z_(i+1) (gaps wider than
+# RANGE_MAX_STEP in ln(1+z) are subdivided) rather than restarted from z = 0
+# for every point, so the total work is O(n) in the number of redshifts.
+# Returns a DataFrame with z plus RESULT_KEYS, in the order given.
+def cosmology_over_z(z_values, H0=69.6, WM=0.286, WV=0.714, radiation=True):
+    z_values = np.asarray(z_values, dtype=float)
+    h = H0 / 100.0
+    WR = WR_COEFF / (h * h) if radiation else 0.0
+    WK = 1 - WM - WR - WV
+
+    order = np.argsort(z_values, kind='stable')
+    x_points = np.r_[0.0, np.log1p(z_values[order])]
+    pieces = np.maximum(np.ceil(np.diff(x_points) / RANGE_MAX_STEP).astype(np.int64), 1)
+    # Refined grid: every step split into `pieces` equal parts
+    lo = np.repeat(x_points[:-1], pieces)
+    width = np.repeat(np.diff(x_points) / pieces, pieces)
+    lo = lo + width * (np.arange(len(lo)) - np.repeat(np.cumsum(pieces) - pieces, pieces))
+
+    t, w = np.polynomial.legendre.leggauss(RANGE_NODES)
+    xs = lo[:, None] + width[:, None] * 0.5 * (t + 1.0)
+    a = np.exp(-xs)
+    adot = _adot(a, WK, WM, WR, WV)
+    # d(DCMR)/dx = 1/adot, d(DTT)/dx = a/adot with x = ln(1+z)
+    seg_dcmr = width * 0.5 * ((1.0 / adot) @ w)
+    seg_dtt = width * 0.5 * ((a / adot) @ w)
+    ends = np.cumsum(pieces) - 1
+    DCMR = np.cumsum(seg_dcmr)[ends]
+    DTT = np.cumsum(seg_dtt)[ends]
+
+    # Age at the highest z directly, then accumulated downwards
+    a_min = np.exp(-x_points[-1])
+    t_age, w_age = np.polynomial.legendre.leggauss(BATCH_NODES)
+    a_young = a_min * 0.5 * (t_age + 1.0)
+    age_top = a_min * 0.5 * (w_age / _adot(a_young, WK, WM, WR, WV)).sum()
+    zage = age_top + (DTT[-1] - DTT) if len(DTT) else DTT
+
+    results = _derived_quantities(z_values[order], H0, WK, zage, DTT, DCMR)
+    table = pd.DataFrame({"z": z_values[order], **results}, columns=["z"] + RESULT_KEYS)
+    table.index = order
+    return table.sort_index()
+
+# ------------------ Interpolation tables ------------------
+# Nodes per grid interval when building the cumulative integrals.
+TABLE_NODES = 8
+
+# Precomputed distance/time tables for one (H0, WM, WV). The integrals are
+# tabulated once on a grid uniform in x = ln(1+z) and looked up with cubic
+# Hermite splines, using the exact derivatives of each integral as slopes.
+# The grid is doubled until the worst relative error at the interval
+# midpoints (checked against direct quadrature) is below rtol; the achieved
+# value is kept in `error_bound`. Inverse lookups (z from distance or time)
+# use the same nodes with the axes swapped.
+class CosmologyTable:
+    def __init__(self, H0=69.6, WM=0.286, WV=0.714, z_max=1100.0, rtol=1e-8,
+                 n_start=512, n_max=2 ** 20):
+        self.H0, self.WM, self.WV, self.z_max = float(H0), float(WM), float(WV), float(z_max)
+        h = self.H0 / 100.0
+        self.WR = WR_COEFF / (h * h)
+        self.WK = 1 - self.WM - self.WR - self.WV
+
+        n = n_start
+        while True:
+            x, dcmr, dtt, zage, slopes, error = self._build(n)
+            if error <= rtol or n >= n_max:
+                break
+            n *= 2
+        self.n_points = n + 1
+        self.error_bound = error
+        self._x = x
+        d_dcmr, d_dtt, d_zage = slopes
+
+        self._dcmr = CubicHermiteSpline(x, dcmr, d_dcmr)
+        self._dtt = CubicHermiteSpline(x, dtt, d_dtt)
+        self._zage = CubicHermiteSpline(x, zage, d_zage)
+        # Inverses: all three integrals are strictly monotonic in x
+        self._x_of_dcmr = CubicHermiteSpline(dcmr, x, 1.0 / d_dcmr)
+        self._x_of_dtt = CubicHermiteSpline(dtt, x, 1.0 / d_dtt)
+        self._x_of_zage = CubicHermiteSpline(zage[::-1], x[::-1], 1.0 / d_zage[::-1])
+
+    def _integrands(self, x):
+        # d(DCMR)/dx = 1/adot and d(DTT)/dx = a/adot, with a = exp(-x)
+        a = np.exp(-x)
+        adot = _adot(a, self.WK, self.WM, self.WR, self.WV)
+        return 1.0 / adot, a / adot
+
+    def _interval_integrals(self, lo, hi):
+        t, w = np.polynomial.legendre.leggauss(TABLE_NODES)
+        t, w = 0.5 * (t + 1.0), 0.5 * w
+        xs = lo[:, None] + (hi - lo)[:, None] * t
+        f_dcmr, f_dtt = self._integrands(xs)
+        return (hi - lo) * (f_dcmr @ w), (hi - lo) * (f_dtt @ w)
+
+    def _build(self, n):
+        x = np.linspace(0.0, np.log1p(self.z_max), n + 1)
+        seg_dcmr, seg_dtt = self._interval_integrals(x[:-1], x[1:])
+        dcmr = np.concatenate([[0.0], np.cumsum(seg_dcmr)])
+        dtt = np.concatenate([[0.0], np.cumsum(seg_dtt)])
+
+        # Age at z_max directly over [0, a_min], then accumulated downwards in z
+        # so that high-z ages keep their own relative precision.
+        a_min = np.exp(-x[-1])
+        t, w = np.polynomial.legendre.leggauss(BATCH_NODES)
+        a = a_min * 0.5 * (t + 1.0)
+        age_top = a_min * 0.5 * (w / _adot(a, self.WK, self.WM, self.WR, self.WV)).sum()
+        zage = age_top + np.concatenate([np.cumsum(seg_dtt[::-1])[::-1], [0.0]])
+
+        d_dcmr, d_dtt = self._integrands(x)
+        slopes = (d_dcmr, d_dtt, -d_dtt)
+
+        # Error check at interval midpoints against direct quadrature
+        mid = 0.5 * (x[:-1] + x[1:])
+        half_dcmr, half_dtt = self._interval_integrals(x[:-1], mid)
+        exact = (dcmr[:-1] + half_dcmr, dtt[:-1] + half_dtt, zage[:-1] - half_dtt)
+        error = 0.0
+        for values, slope, truth in zip((dcmr, dtt, zage), slopes, exact):
+            approx = CubicHermiteSpline(x, values, slope)(mid)
+            error = max(error, float(np.max(np.abs(approx - truth) / np.abs(truth))))
+        return x, dcmr, dtt, zage, slopes, error
+
+    def _x_of_z(self, z):
+        z = np.asarray(z, dtype=float)
+        if np.any(z < 0) or np.any(z > self.z_max):
+            raise ValueError(f"Redshift outside the tabulated range 0 <= z <= {self.z_max}.")
+        return np.log1p(z)
+
+    def _z_of(self, inverse, values, scale, quantity, unit):
+        # Inverse lookup; like _x_of_z, values outside the table raise instead
+        # of being clamped to z = 0 or z_max
+        q = np.asarray(values, dtype=float) * scale
+        lo, hi = inverse.x[0], inverse.x[-1]
+        slack = 1e-12 * max(abs(lo), abs(hi))   # unit conversion round-off at the ends
+        if np.any(q < lo - slack) or np.any(q > hi + slack):
+            raise ValueError(f"{quantity} outside the tabulated range {lo / scale:.6g} to {hi / scale:.6g} {unit} "
+                             f"(0 <= z <= {self.z_max}).")
+        # The clip only absorbs spline round-off at the two ends
+        return np.expm1(np.clip(inverse(q), 0.0, self._x[-1]))
+
+    # ---- forward lookups ----
+    def comoving_distance(self, z):
+        return (C_LIGHT / self.H0) * self._dcmr(self._x_of_z(z))
+
+    def lookback_time(self, z):
+        return (TYR / self.H0) * self._dtt(self._x_of_z(z))
+
+    def age(self, z):
+        return (TYR / self.H0) * self._zage(self._x_of_z(z))
+
+    # Same keys as cosmology_calculator, as arrays
+    def evaluate(self, z):
+        z = np.asarray(z, dtype=float)
+        x = self._x_of_z(z)
+        return _derived_quantities(z, self.H0, self.WK, self._zage(x), self._dtt(x), self._dcmr(x))
+
+    # ---- inverse lookups ----
+    def z_at_comoving_distance(self, DCMR_Mpc):
+        return self._z_of(self._x_of_dcmr, DCMR_Mpc, self.H0 / C_LIGHT, "Comoving distance", "Mpc")
+
+    def z_at_lookback_time(self, t_Gyr):
+        return self._z_of(self._x_of_dtt, t_Gyr, self.H0 / TYR, "Lookback time", "Gyr")
+
+    def z_at_age(self, age_Gyr):
+        return self._z_of(self._x_of_zage, age_Gyr, self.H0 / TYR, "Age", "Gyr")
+
+# ------------------ Result cache ------------------
+# Process-wide memo for cosmology_calculator. Inputs are quantized to `digits`
+# significant figures so that widget round-off maps to the same entry. The
+# in-memory layer holds at most `maxsize` results and evicts by `policy`
+# ("lru" or "fifo"); with `disk_path` set, results are also kept in a SQLite
+# file shared by every process on the machine.
+class ResultCache:
+    def __init__(self, maxsize=1024, digits=10, policy="lru", disk_path=None):
+        if policy not in ("lru", "fifo"):
+            raise ValueError(f"Unknown eviction policy: {policy}")
+        self.maxsize, self.digits, self.policy = maxsize, digits, policy
+        self.disk_path = disk_path
+        self.hits = self.misses = self.disk_hits = self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if disk_path:
+            with sqlite3.connect(disk_path) as db:
+                db.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT)")
+
+    def key(self, *args, **options):
+        quantize = lambda v: float(f"{v:.{self.digits}g}") if isinstance(v, float) else v
+        return repr((tuple(quantize(float(a)) for a in args),
+                     tuple(sorted((k, quantize(v)) for k, v in options.items()))))
+
+    def _disk_get(self, key):
+        with sqlite3.connect(self.disk_path) as db:
+            row = db.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _disk_put(self, key, value):
+        with sqlite3.connect(self.disk_path) as db:
+            db.execute("INSERT OR REPLACE INTO results VALUES (?, ?)", (key, json.dumps(value)))
+
+    def _store(self, key, value):
+        self._entries[key] = value
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get_or_compute(self, func, *args, **options):
+        key = self.key(*args, **options)
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                if self.policy == "lru":
+                    self._entries.move_to_end(key)
+                return dict(self._entries[key])
+        value = self._disk_get(key) if self.disk_path else None
+        with self._lock:
+            if value is not None:
+                self.hits += 1
+                self.disk_hits += 1
+            else:
+                self.misses += 1
+        if value is None:
+            value = {k: (v.item() if isinstance(v, np.generic) else v) for k, v in func(*args, **options).items()}
+            if self.disk_path:
+                self._disk_put(key, value)
+        with self._lock:
+            self._store(key, value)
+        return dict(value)
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "disk_hits": self.disk_hits,
+                    "evictions": self.evictions, "size": len(self._entries), "maxsize": self.maxsize}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.disk_hits = self.evictions = 0
+
+# Shared cache; size and the optional on-disk layer can be set per deployment
+# through COSMOLOGY_CACHE_SIZE and COSMOLOGY_CACHE_PATH, or with configure_cache.
+RESULT_CACHE = ResultCache(maxsize=int(os.environ.get("COSMOLOGY_CACHE_SIZE", 1024)),
+                           disk_path=os.environ.get("COSMOLOGY_CACHE_PATH") or None)
+
+def configure_cache(maxsize=1024, digits=10, policy="lru", disk_path=None):
+    global RESULT_CACHE
+    RESULT_CACHE = ResultCache(maxsize, digits, policy, disk_path)
+    return RESULT_CACHE
+
+def cached_cosmology_calculator(z, H0, WM, WV, **options):
+    return RESULT_CACHE.get_or_compute(cosmology_calculator, z, H0, WM, WV, **options)
+
+# ------------------ Parameter sweeps ------------------
+SWEEP_COLUMNS = ["H0", "WM", "WV", "z"] + RESULT_KEYS
+
+def _sweep_block(params, z_values):
+    # params: (m, 3) array of (H0, WM, WV); evaluated against every z
+    H0, WM, WV = (params[:, i][:, None] for i in range(3))
+    z = np.asarray(z_values, dtype=float)[None, :]
+    results = cosmology_calculator_batch(z, H0, WM, WV)
+    grid = np.broadcast_arrays(H0, WM, WV, z)
+    columns = {name: values.ravel() for name, values in zip(["H0", "WM", "WV", "z"], grid)}
+    columns.update({key: value.ravel() for key, value in results.items()})
+    return pd.DataFrame(columns, columns=SWEEP_COLUMNS)
+
+# Evaluates every (H0, WM, WV) combination of the given values at every z,
+# split into blocks of `block` cosmologies across a process pool. Yields one
+# DataFrame per block, in grid order, as blocks finish; at most 2 * workers
+# blocks are in flight, so memory does not grow with the grid size.
+# `progress(done_rows, total_rows, rows_per_second)` is called after each block.
+def cosmology_sweep(H0_values, WM_values, WV_values, z_values, workers=None, block=64, progress=None):
+    params = np.array(np.meshgrid(H0_values, WM_values, WV_values, indexing='ij'), dtype=float).reshape(3, -1).T
+    z_values = np.asarray(z_values, dtype=float)
+    blocks = [params[i:i + block] for i in range(0, len(params), block)]
+    total_rows, done_rows = len(params) * len(z_values), 0
+    workers = workers or os.cpu_count()
+    start = time.perf_counter()
+
+    # spawn: Streamlit serves sessions from threads, which fork does not handle safely
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        pending, finished, next_block, next_yield = {}, {}, 0, 0
+        while next_yield < len(blocks):
+            while next_block < len(blocks) and len(pending) + len(finished) < 2 * workers:
+                pending[pool.submit(_sweep_block, blocks[next_block], z_values)] = next_block
+                next_block += 1
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                finished[pending.pop(future)] = future.result()
+            while next_yield in finished:
+                frame = finished.pop(next_yield)
+                next_yield += 1
+                done_rows += len(frame)
+                if progress:
+                    progress(done_rows, total_rows, done_rows / (time.perf_counter() - start))
+                yield frame
+
+# Runs cosmology_sweep and appends each block to `path` as it arrives:
+# Parquet for *.parquet (needs pyarrow), CSV otherwise. Returns the row count.
+def cosmology_sweep_to_file(path, H0_values, WM_values, WV_values, z_values, **options):
+    rows = 0
+    if path.endswith(".parquet"):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        writer = None
+        try:
+            for frame in cosmology_sweep(H0_values, WM_values, WV_values, z_values, **options):
+                table = pa.Table.from_pandas(frame, preserve_index=False)
+                writer = writer or pq.ParquetWriter(path, table.schema)
+                writer.write_table(table)
+                rows += len(frame)
+        finally:
+            if writer:
+                writer.close()
+    else:
+        with open(path, "w", newline="") as f:
+            for i, frame in enumerate(cosmology_sweep(H0_values, WM_values, WV_values, z_values, **options)):
+                frame.to_csv(f, header=(i == 0), index=False)
+                rows += len(frame)
+    return rows
@@ -0,0 +1,130 @@
+# Headless batch renderer for GraphAway plots.
+#
+#   python graphaway_cli.py spec.json data/*.txt --out-dir plots --format png pdf --jobs 8
+#
+# The spec is a JSON object. "kind" is "line" (default), "pie" or "bar"; the
+# other keys mirror the Streamlit controls:
+#   line: x_column, y_columns, color_groups, color_labels, pattern_groups,
+#         pattern_labels ([label, style] pairs), bullet_groups, bullet_labels
+#         ([label, marker] pairs), x_log, y_log, x_range, y_range, title,
+#         x_label, y_label, font_sizes, marker_size, show_background,
+#         show_legend, downsample, max_points
+#   pie:  column
+#   bar:  x_column, y_column, label_column
+#   all:  whitespace (true for TXT files), dpi
+# Text fields may use {stem} for the input file name without extension; it is
+# replaced literally, so any other braces (Matplotlib mathtext) need no escaping.
+#
+# Each input is written as <out-dir>/<stem>.<format>. When inputs from
+# different directories share a stem (a/x.txt and b/x.txt), the outputs mirror
+# the input paths below their common directory instead (<out-dir>/a/x.png,
+# <out-dir>/b/x.png); inputs that would still collide, such as x.csv and x.txt
+# in one directory, are rejected before anything is rendered.
+import argparse
+import json
+import os
+import sys
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+
+from graphaway_core import load_dataset, render_graph, render_pie_chart, render_bar_chart, DOWNSAMPLE_MAX_POINTS
+
+FORMATS = ["png", "pdf", "svg"]
+
+def output_names(files):
+    # {input path: output path without extension, relative to the output directory}
+    files = list(dict.fromkeys(files))
+    stems = [os.path.splitext(os.path.basename(path))[0] for path in files]
+    if len(set(stems)) == len(stems):
+        return dict(zip(files, stems))
+    root = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in files])
+    return {path: os.path.splitext(os.path.relpath(os.path.abspath(path), root))[0] for path in files}
+
+def render_file(path, spec, out_dir, formats, out_name=None):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    text = lambda key, default="": spec.get(key, default).replace("{stem}", stem)
+    data = load_dataset(path, whitespace=spec.get("whitespace", False))
+    kind = spec.get("kind", "line")
+
+    if kind == "line":
+        x_column = spec.get("x_column", data.columns[0])
+        y_columns = spec.get("y_columns", [data.columns[1]])
+        # Without color groups every column gets its own color, as in the app
+        color_groups, color_labels = spec.get("color_groups"), spec.get("color_labels", [])
+        if not color_groups:
+            color_groups, color_labels = [[col] for col in y_columns], y_columns
+        fig, _, _ = render_graph(
+            data, x_column, y_columns,
+            color_groups, spec.get("pattern_groups", []), spec.get("bullet_groups", []),
+            color_labels,
+            [tuple(p) for p in spec.get("pattern_labels", [])],
+            [tuple(b) for b in spec.get("bullet_labels", [])],
+            spec.get("x_log", False), spec.get("y_log", False),
+            spec.get("x_range"), spec.get("y_range"),
+            text("title", f"Multiple Curves: Y vs {x_column}"),
+            text("x_label", x_column), text("y_label", "Y Values"),
+            spec.get("font_sizes", {}), spec.get("marker_size", 6),
+            show_background=spec.get("show_background", False),
+            downsample=spec.get("downsample", "M4"),
+            max_points=spec.get("max_points", DOWNSAMPLE_MAX_POINTS),
+            show_legend=spec.get("show_legend", True)
+        )
+    elif kind == "pie":
+        fig = render_pie_chart(data, spec.get("column", data.columns[0]))
+    elif kind == "bar":
+        fig = render_bar_chart(data, spec.get("x_column", data.columns[0]),
+                               spec.get("y_column", data.columns[1]), spec.get("label_column"))
+    else:
+        raise ValueError(f"Unknown plot kind: {kind}")
+
+    outputs = []
+    out_base = os.path.join(out_dir, out_name or stem)
+    os.makedirs(os.path.dirname(out_base), exist_ok=True)
+    for fmt in formats:
+        out_path = f"{out_base}.{fmt}"
+        fig.savefig(out_path, format=fmt, dpi=spec.get("dpi", 200), bbox_inches='tight')
+        outputs.append(out_path)
+    plt.close(fig)
+    return outputs
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render GraphAway plots for many input files.")
+    parser.add_argument("spec", help="JSON plot spec")
+    parser.add_argument("files", nargs="+", help="input CSV/TXT files")
+    parser.add_argument("--out-dir", default=".", help="output directory")
+    parser.add_argument("--format", nargs="+", default=["png"], choices=FORMATS, dest="formats")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="worker processes")
+    args = parser.parse_args(argv)
+
+    names = output_names(args.files)
+    by_name = defaultdict(list)
+    for path, name in names.items():
+        by_name[name].append(path)
+    clashes = [paths for paths in by_name.values() if len(paths) > 1]
+    if clashes:
+        parser.error("these inputs would overwrite each other's output: "
+                     + "; ".join(", ".join(paths) for paths in clashes))
+
+    with open(args.spec) as f:
+        spec = json.load(f)
+    os.makedirs(args.out_dir, exist_ok=True)
+
+    failed = 0
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        futures = {pool.submit(render_file, path, spec, args.out_dir, args.formats, name): path
+                   for path, name in names.items()}
+        for future in as_completed(futures):
+            try:
+                for out_path in future.result():
+                    print(out_path)
+            except Exception as e:
+                failed += 1
+                print(f"{futures[future]}: {e}", file=sys.stderr)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,516 @@
+# Plotting, parsing and integration for GraphAway without any Streamlit
+# dependency, shared by the Streamlit app (Graphaway.py) and the batch
+# renderer (graphaway_cli.py).
+#
+# pandas, matplotlib, plotly and scipy are imported inside the functions that
+# need them, so importing this module (and starting the app) costs only numpy:
+# scipy loads on the first integration, the matplotlib backend on the first
+# Matplotlib figure. benchmarks/import_time.py measures the effect.
+import hashlib
+import os
+import tempfile
+import numpy as np
+
+import array_cache
+
+# ------------------ Utilities ------------------
+spectral_regions = [
+    ("Radio", 0, 3e9, "lightblue"),
+    ("Microwave", 3e9, 3e12, "lightgreen"),
+    ("Infrared", 3e12, 2.99e14, "lightcoral"),
+    ("Visible", 3.01e14, 7.5e14, "khaki"),
+    ("UV", 7.5e14, 3e16, "violet"),
+    ("X-ray", 3e16, 3e19, "orange"),
+    ("Gamma-ray", 3e19, 3e30, "red")
+]
+
+# Rows parsed per chunk when streaming an upload
+CHUNK_ROWS = 200_000
+
+def stream_read(source, whitespace=False, progress=None):
+    # Reads a CSV / whitespace-separated file in chunks with the C parser so
+    # peak memory stays near the size of the final frame. `progress`, if given,
+    # is called with the running row count after every chunk.
+    import pandas as pd
+
+    sep = r"\s+" if whitespace else ","
+
+    def read_chunks(dtype, convert):
+        chunks, rows = [], 0
+        for chunk in pd.read_csv(source, sep=sep, engine='c', chunksize=CHUNK_ROWS, dtype=dtype):
+            chunks.append(convert(chunk))
+            rows += len(chunk)
+            if progress:
+                progress(rows)
+        return pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame()
+
+    try:
+        # Fast path: every cell parses straight to float64
+        return read_chunks(np.float64, lambda chunk: chunk)
+    except ValueError:
+        # Non-numeric cells present: parse as-is and coerce once per chunk
+        if hasattr(source, "seek"):
+            source.seek(0)
+        return read_chunks(None, lambda chunk: chunk.apply(pd.to_numeric, errors='coerce'))
+
+# ------------------ Dataset cache ------------------
+# Parsed uploads are stored once as a column-major float64 .npy (plus a JSON
+# list of column names) named by a hash of the file contents, and memory-mapped
+# on later reruns instead of re-parsing the text. array_cache evicts entries
+# by DATASET_CACHE_MAX_AGE and DATASET_CACHE_MAX_BYTES.
+DATASET_CACHE_DIR = os.environ.get("GRAPHAWAY_CACHE_DIR", os.path.join(tempfile.gettempdir(), "graphaway_cache"))
+DATASET_CACHE_MAX_BYTES = 2 * 1024 ** 3
+DATASET_CACHE_MAX_AGE = 24 * 3600
+
+def dataset_key(source, whitespace):
+    # source is an uploaded file (in-memory buffer) or a path on disk
+    digest = array_cache.content_digest(source)
+    digest.update(b"whitespace" if whitespace else b"csv")
+    return digest.hexdigest()
+
+def load_cached_dataset(key):
+    import pandas as pd
+
+    cached = array_cache.load(DATASET_CACHE_DIR, key)
+    if cached is None:
+        return None
+    values, columns = cached
+    return pd.DataFrame(values, columns=columns, copy=False)
+
+def store_dataset(key, df):
+    import pandas as pd
+
+    if df.empty or not all(pd.api.types.is_numeric_dtype(t) for t in df.dtypes):
+        return
+    array_cache.store(DATASET_CACHE_DIR, key, np.asfortranarray(df.to_numpy(dtype=np.float64)), df.columns,
+                      DATASET_CACHE_MAX_BYTES, DATASET_CACHE_MAX_AGE)
+
+def evict_datasets(max_bytes=DATASET_CACHE_MAX_BYTES, max_age=DATASET_CACHE_MAX_AGE):
+    array_cache.evict(DATASET_CACHE_DIR, max_bytes, max_age)
+
+# Parsed dataset for an upload or a path, through the dataset cache. The
+# frame is tagged with its content hash in attrs["dataset_key"].
+def load_dataset(source, whitespace=False, progress=None):
+    key = dataset_key(source, whitespace)
+    df = load_cached_dataset(key)
+    if df is None:
+        df = stream_read(source, whitespace=whitespace, progress=progress)
+        store_dataset(key, df)
+        # Return what every later rerun gets from the cache (float64 columns),
+        # not the parse, whose integer columns would change type after one rerun
+        cached = load_cached_dataset(key)
+        if cached is not None:
+            df = cached
+    df.attrs["dataset_key"] = key
+    return df
+
+# ------------------ Downsampling ------------------
+# Series longer than max_points are reduced before plotting. Both methods work
+# in screen space (log10 of the data on log-scaled axes) and keep the first and
+# last point of the visible part of the series: with an x range, the series is
+# first cut to that range widened by X_RANGE_MARGIN of its width, plus one
+# point beyond each edge so lines still run off the plot, and the point budget
+# is spent there:
+#   M4:   per pixel column, keep the first, last, min and max point
+#   LTTB: Largest-Triangle-Three-Buckets, one point per bucket chosen to
+#         preserve the visual shape
+DOWNSAMPLE_METHODS = ["Off", "M4", "LTTB"]
+DOWNSAMPLE_MAX_POINTS = 4000
+X_RANGE_MARGIN = 0.05
+
+def _screen_coords(x, y, x_log, y_log):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        tx = np.log10(x) if x_log else x
+        ty = np.log10(y) if y_log else y
+    keep = np.isfinite(tx) & np.isfinite(ty)
+    return np.flatnonzero(keep), tx[keep], ty[keep]
+
+def downsample_m4(tx, ty, n_buckets):
+    span = tx[-1] - tx[0]   # negative when x runs downwards, which the ratio below absorbs
+    if span == 0:
+        return np.array([0, len(tx) - 1])
+    buckets = np.minimum(((tx - tx[0]) / span * n_buckets).astype(np.int64), n_buckets - 1)
+    starts = np.flatnonzero(np.r_[True, np.diff(buckets) != 0])
+    ends = np.r_[starts[1:], len(tx)] - 1
+    # Within each bucket, order by y: the first entry is the min, the last the max
+    order = np.lexsort((ty, buckets))
+    group_start = np.searchsorted(buckets[order], buckets[starts], side='left')
+    group_end = np.searchsorted(buckets[order], buckets[starts], side='right') - 1
+    return np.unique(np.concatenate([starts, ends, order[group_start], order[group_end]]))
+
+def downsample_lttb(tx, ty, n_out):
+    n = len(tx)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    prev = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], max(edges[i + 1], edges[i] + 1)
+        # Average of the next bucket (or the last point) is the third vertex
+        nlo, nhi = hi, (edges[i + 2] if i + 2 < len(edges) else n)
+        avg_x, avg_y = tx[nlo:max(nhi, nlo + 1)].mean(), ty[nlo:max(nhi, nlo + 1)].mean()
+        area = np.abs((tx[prev] - avg_x) * (ty[lo:hi] - ty[prev]) - (tx[prev] - tx[lo:hi]) * (avg_y - ty[prev]))
+        prev = lo + int(np.argmax(area))
+        selected[i + 1] = prev
+    return selected
+
+def _visible_slice(tx, x_range, x_log):
+    # [first, last) positions of monotonic screen x that fall in the widened x range
+    with np.errstate(divide='ignore', invalid='ignore'):
+        bounds = np.log10(np.asarray(x_range, dtype=float)) if x_log else np.asarray(x_range, dtype=float)
+    bounds = np.where(np.isnan(bounds), [-np.inf, np.inf], bounds)
+    lo, hi = min(bounds), max(bounds)
+    if np.isfinite(hi - lo):
+        lo, hi = lo - X_RANGE_MARGIN * (hi - lo), hi + X_RANGE_MARGIN * (hi - lo)
+    if len(tx) > 1 and tx[-1] < tx[0]:
+        tx, lo, hi = -tx, -hi, -lo
+    first = max(int(np.searchsorted(tx, lo, side='left')) - 1, 0)
+    last = min(int(np.searchsorted(tx, hi, side='right')) + 1, len(tx))
+    return first, last
+
+def downsample_series(x, y, method, max_points=DOWNSAMPLE_MAX_POINTS, x_log=False, y_log=False, x_range=None):
+    # Returns the row positions to draw. x must be monotonic for decimation to
+    # apply; otherwise (or when short enough) every row is kept.
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if method == "Off" or len(x) <= max_points:
+        return np.arange(len(x))
+    valid, tx, ty = _screen_coords(x, y, x_log, y_log)
+    step = np.diff(tx)
+    if len(tx) <= max_points or not (np.all(step >= 0) or np.all(step <= 0)):
+        return np.arange(len(x))
+    if x_range:
+        first, last = _visible_slice(tx, x_range, x_log)
+        valid, tx, ty = valid[first:last], tx[first:last], ty[first:last]
+        if len(tx) <= max_points:
+            return valid
+    if method == "M4":
+        picked = downsample_m4(tx, ty, max(max_points // 4, 1))
+    else:
+        picked = downsample_lttb(tx, ty, max_points)
+    return valid[picked]
+
+# Resolves the color / pattern / bullet groups into one
+# (color, linestyle, marker, label) tuple per y column. Shared by the
+# Matplotlib and WebGL renderers so both draw the same legend.
+def series_styles(y_columns, color_groups, pattern_groups, bullet_groups,
+                  color_labels, pattern_labels, bullet_labels):
+    from matplotlib import colormaps       # colormaps only, no backend
+
+    tab10 = colormaps["tab10"]
+    pattern_styles = {'solid': '-', 'dotted': ':', 'dashed': '--', 'dashdot': '-.'}
+
+    # ------------------ Colors ------------------
+    color_idx = 0
+    column_colors, column_labels = {}, {}
+    for idx, group in enumerate(color_groups):
+        color = tab10(color_idx % 10)
+        color_idx += 1
+        label = color_labels[idx] if color_labels and idx < len(color_labels) else f"Group {idx+1}"
+        for col in group:
+            column_colors[col] = color
+            column_labels[col] = label
+
+    # ------------------ Patterns ------------------
+    column_linestyles, column_pattern_labels = {}, {}
+    for idx, group in enumerate(pattern_groups):
+        style = '-'
+        label = f"Pattern {idx+1}"
+        if pattern_labels and idx < len(pattern_labels):
+            label, style_key = pattern_labels[idx]
+            style = pattern_styles.get(style_key, '-')
+        for col in group:
+            column_linestyles[col] = style
+            column_pattern_labels[col] = label
+
+    # ------------------ Markers ------------------
+    column_markers, column_marker_labels = {}, {}
+    for idx, group in enumerate(bullet_groups):
+        marker = 'o'
+        label = f"Bullet {idx+1}"
+        if bullet_labels and idx < len(bullet_labels):
+            label, marker = bullet_labels[idx]
+        for col in group:
+            column_markers[col] = marker
+            column_marker_labels[col] = label
+
+    styles = {}
+    for col in y_columns:
+        color = column_colors.get(col, tab10(color_idx % 10))
+        if col not in column_colors:
+            color_idx += 1
+        linestyle = column_linestyles.get(col, '-')
+        marker = column_markers.get(col, 'o')
+        label = column_labels.get(col) or column_pattern_labels.get(col) or column_marker_labels.get(col) or col
+        styles[col] = (color, linestyle, marker, label)
+    return styles
+
+# Builds the line-graph figure; returns (figure, points drawn, points in data)
+def render_graph(data, x_column, y_columns, color_groups, pattern_groups, bullet_groups,
+                 color_labels, pattern_labels, bullet_labels,
+                 x_log_scale, y_log_scale, x_range, y_range,
+                 title, x_label, y_label, font_sizes, marker_size, show_background=False,
+                 downsample="Off", max_points=DOWNSAMPLE_MAX_POINTS, show_legend=True):
+    import matplotlib.pyplot as plt
+
+    fig = plt.figure(figsize=(10, 6))
+
+    # --- Background spectral regions ---
+    if show_background and y_range:
+        for label, x_min, x_max, color in spectral_regions:
+            plt.fill_between(
+                [x_min, x_max], [y_range[0]]*2, [y_range[1]]*2,
+                color=color, alpha=0.2, label=label
+            )
+
+    styles = series_styles(y_columns, color_groups, pattern_groups, bullet_groups,
+                           color_labels, pattern_labels, bullet_labels)
+    used_labels = set()
+    points_total = points_drawn = 0
+
+    for col in y_columns:
+        color, linestyle, marker, label = styles[col]
+
+        x_values, y_values = data[x_column].to_numpy(), data[col].to_numpy()
+        rows = downsample_series(x_values, y_values, downsample, max_points, x_log_scale, y_log_scale, x_range)
+        points_total += len(x_values)
+        points_drawn += len(rows)
+        x_values, y_values = x_values[rows], y_values[rows]
+
+        if label not in used_labels:
+            plt.plot(x_values, y_values, marker=marker, markersize=marker_size,
+                     linestyle=linestyle, color=color, label=label)
+            used_labels.add(label)
+        else:
+            plt.plot(x_values, y_values, marker=marker, markersize=marker_size,
+                     linestyle=linestyle, color=color)
+
+    if x_log_scale:
+        plt.xscale('log')
+    if y_log_scale:
+        plt.yscale('log')
+    if x_range:
+        plt.xlim(x_range)
+    if y_range:
+        plt.ylim(y_range)
+    
+        
+    plt.title(title, fontsize=font_sizes.get("title", 16))
+    plt.xlabel(x_label, fontsize=font_sizes.get("labels", 14))
+    plt.ylabel(y_label, fontsize=font_sizes.get("labels", 14))
+    plt.xticks(fontsize=font_sizes.get("ticks", 12))
+    plt.yticks(fontsize=font_sizes.get("ticks", 12))
+    plt.grid(True)
+    if show_legend:
+        plt.legend(title="Legend", fontsize=font_sizes.get("legend", 12))    
+    plt.tight_layout()
+    return fig, points_drawn, points_total
+
+SAVEFIG_OPTIONS = {'bbox_inches': 'tight', 'dpi': 200, 'format': 'png'}   # same as st.pyplot
+
+def data_fingerprint(data):
+    key = data.attrs.get("dataset_key")
+    if key is None:
+        import pandas as pd
+        hashed = pd.util.hash_pandas_object(data, index=True).to_numpy()
+        key = hashlib.blake2b(hashed.tobytes() + repr(list(data.columns)).encode(), digest_size=20).hexdigest()
+    return key
+
+# ------------------ WebGL figure ------------------
+# Same arguments and group semantics as render_graph, as a plotly Scattergl
+# figure: the full data is sent once and zoom/pan happen in the browser.
+PLOTLY_DASHES = {'-': 'solid', ':': 'dot', '--': 'dash', '-.': 'dashdot'}
+PLOTLY_SYMBOLS = {'o': 'circle', 's': 'square', '^': 'triangle-up', 'D': 'diamond',
+                  '*': 'star', '+': 'cross-thin-open', 'x': 'x-thin-open'}
+
+def render_graph_webgl(data, x_column, y_columns, color_groups, pattern_groups, bullet_groups,
+                       color_labels, pattern_labels, bullet_labels,
+                       x_log_scale, y_log_scale, x_range, y_range,
+                       title, x_label, y_label, font_sizes, marker_size, show_background=False,
+                       show_legend=True):
+    import matplotlib.colors as mcolors
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+
+    # --- Background spectral regions ---
+    if show_background and y_range:
+        for label, x_min, x_max, color in spectral_regions:
+            fig.add_trace(go.Scatter(
+                x=[x_min, x_max, x_max, x_min, x_min],
+                y=[y_range[0], y_range[0], y_range[1], y_range[1], y_range[0]],
+                fill='toself', fillcolor=color, opacity=0.2, mode='none',
+                name=label, hoverinfo='skip'
+            ))
+
+    styles = series_styles(y_columns, color_groups, pattern_groups, bullet_groups,
+                           color_labels, pattern_labels, bullet_labels)
+    used_labels = set()
+    x_values = data[x_column].to_numpy()
+    for col in y_columns:
+        color, linestyle, marker, label = styles[col]
+        fig.add_trace(go.Scattergl(
+            x=x_values, y=data[col].to_numpy(),
+            mode='lines+markers' if marker_size > 0 else 'lines',
+            line=dict(color=mcolors.to_hex(color), dash=PLOTLY_DASHES.get(linestyle, 'solid')),
+            marker=dict(symbol=PLOTLY_SYMBOLS.get(marker, 'circle'), size=marker_size),
+            name=label, legendgroup=label, showlegend=label not in used_labels
+        ))
+        used_labels.add(label)
+
+    # Plotly expects log-axis ranges in decades
+    def axis_range(bounds, log):
+        if not bounds:
+            return None
+        if log:
+            return [np.log10(b) if b > 0 else None for b in bounds]
+        return list(bounds)
+
+    tick_font = dict(size=font_sizes.get("ticks", 12))
+    fig.update_layout(
+        title=dict(text=title, font=dict(size=font_sizes.get("title", 16))),
+        xaxis=dict(title=dict(text=x_label, font=dict(size=font_sizes.get("labels", 14))),
+                   type='log' if x_log_scale else 'linear', range=axis_range(x_range, x_log_scale),
+                   tickfont=tick_font, showgrid=True),
+        yaxis=dict(title=dict(text=y_label, font=dict(size=font_sizes.get("labels", 14))),
+                   type='log' if y_log_scale else 'linear', range=axis_range(y_range, y_log_scale),
+                   tickfont=tick_font, showgrid=True),
+        showlegend=show_legend,
+        legend=dict(title=dict(text="Legend"), font=dict(size=font_sizes.get("legend", 12))),
+        height=600,
+    )
+    return fig
+
+
+# ------------------ Pie & Bar charts ------------------
+def render_pie_chart(data, column):
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots()
+    data[column].value_counts().plot.pie(autopct='%1.1f%%', ax=ax)
+    ax.set_title(f"Pie Chart of {column}")
+    return fig
+
+def render_bar_chart(data, x_column, y_column, label_column=None):
+    import matplotlib.pyplot as plt
+
+    labels = data[label_column or x_column].astype(str)
+    fig, ax = plt.subplots()
+    ax.bar(labels, data[y_column])
+    ax.set_xlabel(x_column)
+    ax.set_ylabel(y_column)
+    ax.set_title(f"{y_column} vs {x_column}")
+    plt.xticks(rotation=45, ha='right')
+    plt.tight_layout()
+    return fig
+
+# Quadrature weights of Simpson's 3/8 rule on an arbitrary grid: each panel of
+# three intervals is integrated with the exact integral of the cubic through
+# its four points. The Lagrange weights are closed-form in the node offsets and
+# evaluated elementwise over all panels, so time and memory stay O(n). On a
+# uniform grid this is the classic 3h/8 [1, 3, 3, 1].
+def simpson38_weights(x):
+    x = np.asarray(x, dtype=float)
+    m = (len(x) - 1) // 3
+    t0 = x[0:3 * m:3]
+    t1 = x[1:3 * m:3] - t0          # node offsets within each panel
+    t2 = x[2:3 * m:3] - t0
+    H = x[3:3 * m + 1:3] - t0
+
+    # Integral over [0, H] of (t - p)(t - q)(t - r), elementwise per panel
+    def cubic(p, q, r):
+        return H * H * (H * H / 4 - (p + q + r) * H / 3 + (p * q + p * r + q * r) / 2) - p * q * r * H
+
+    zero = np.zeros_like(H)
+    weights = np.zeros(len(x))
+    weights[0:3 * m:3] += cubic(t1, t2, H) / (-t1 * t2 * H)
+    weights[1:3 * m:3] += cubic(zero, t2, H) / (t1 * (t1 - t2) * (t1 - H))
+    weights[2:3 * m:3] += cubic(zero, t1, H) / (t2 * (t2 - t1) * (t2 - H))
+    weights[3:3 * m + 1:3] += cubic(zero, t1, t2) / (H * (H - t1) * (H - t2))
+    return weights
+
+# Integrates y over x. y may be 1-D (returns a float) or 2-D with one column per
+# curve sharing the same x (returns one value per column).
+def integrate_curve(x_data, y_data, log_x=False, log_y=False, method='trapezoid'):
+    x_data = np.asarray(x_data, dtype=float)
+    y_data = np.asarray(y_data, dtype=float)
+    if log_x:
+        x_data = np.power(10, x_data)
+    if log_y:
+        y_data = np.power(10, y_data)
+
+    n = len(x_data)
+
+    from scipy.integrate import simpson, trapezoid
+    if method == 'trapezoid':
+        return trapezoid(y_data, x_data, axis=0)
+    elif method == 'Simpson 1/3':
+        if n < 3:
+            return "❌ Simpson's 1/3 rule requires at least 3 points."
+        if (n - 1) % 2 != 0:
+            return "❌ Simpson's 1/3 rule requires an odd number of points."
+        return simpson(y_data, x=x_data, axis=0)
+    elif method == 'Simpson 3/8':
+        if n < 4:
+            return "❌ Simpson's 3/8 rule requires at least 4 points."
+        if (n - 1) % 3 != 0:
+            return "❌ Simpson's 3/8 rule requires intervals multiple of 3."
+        if (x_data[1:] == x_data[:-1]).any():
+            return "❌ Simpson's 3/8 rule requires distinct x values (remove repeated x)."
+        return simpson38_weights(x_data) @ y_data
+    else:
+        return "❌ Unknown method selected."
+
+# Rows with a finite x and at least one finite y, sorted once by x. Returns
+# x (n,) and Y (n, k), one column per y column; the remaining non-finite y
+# values are NaN, and band_integrals skips them column by column, so a gap in
+# one column does not drop that row from the others.
+def sorted_columns(data, x_column, y_columns):
+    values = data[[x_column] + list(y_columns)].to_numpy(dtype=float)
+    finite = np.isfinite(values)
+    values = values[finite[:, 0] & finite[:, 1:].any(axis=1)]
+    values[~np.isfinite(values)] = np.nan
+    values = values[np.argsort(values[:, 0], kind='stable')]
+    return values[:, 0], values[:, 1:]
+
+# Trapezoid integrals of every column of Y over each (name, x_min, x_max, ...)
+# band, e.g. spectral_regions. One O(n) cumulative pass, then each band edge
+# is a binary search plus a linear interpolation inside its interval. x must
+# be sorted. A column with non-finite values is integrated over its finite
+# rows only. Returns an (n_bands, k) array; bands that miss the data, and
+# columns with fewer than two finite rows, are NaN.
+def band_integrals(x, Y, bands, log_x=False, log_y=False):
+    x = np.asarray(x, dtype=float)
+    Y = np.asarray(Y, dtype=float).reshape(len(x), -1)
+    if log_x:
+        x = np.power(10, x)
+    if log_y:
+        Y = np.power(10, Y)
+    lo = np.array([band[1] for band in bands], dtype=float)
+    hi = np.array([band[2] for band in bands], dtype=float)
+
+    result, totals = _band_integrals(x, Y, lo, hi)
+    # A non-finite value anywhere in a column makes its running total non-finite
+    for j in np.flatnonzero(~np.isfinite(totals)):
+        rows = np.isfinite(Y[:, j])
+        if not rows.all():
+            result[:, j] = _band_integrals(x[rows], Y[rows, j:j + 1], lo, hi)[0][:, 0]
+    return result
+
+def _band_integrals(x, Y, lo, hi):
+    # (integrals, running total over all of x per column)
+    if len(x) < 2:
+        return np.full((len(lo), Y.shape[1]), np.nan), np.zeros(Y.shape[1])
+    prefix = np.zeros_like(Y)
+    prefix[1:] = np.cumsum(0.5 * (Y[1:] + Y[:-1]) * np.diff(x)[:, None], axis=0)
+
+    def cumulative_at(t):
+        i = np.clip(np.searchsorted(x, t, side='right') - 1, 0, len(x) - 2)
+        width = x[i + 1] - x[i]
+        frac = np.divide(t - x[i], width, out=np.zeros_like(t), where=width > 0)[:, None]
+        y_t = Y[i] + frac * (Y[i + 1] - Y[i])
+        return prefix[i] + 0.5 * (Y[i] + y_t) * (t - x[i])[:, None]
+
+    result = cumulative_at(np.clip(hi, x[0], x[-1])) - cumulative_at(np.clip(lo, x[0], x[-1]))
+    result[(hi < x[0]) | (lo > x[-1])] = np.nan
+    return result, prefix[-1]
@@ -0,0 +1,89 @@
+# Page registry for multi-page routers such as cloudy_output_interpreter.py.
+#
+# Each page script is read and compiled once; the code object is cached on the
+# file's modification time, so an edited page is recompiled on its next visit.
+# Pages get a `page_resource(name, build)` helper in their globals that keeps
+# expensive module-level objects (parsed tables, models, ...) alive across
+# reruns until the page file changes.
+#
+# The router keeps one registry per process (st.cache_resource), and Streamlit
+# runs every session's script in its own thread, so a resource is shared by
+# all sessions: it must not hold per-user state, and it must be safe to use
+# from several threads at once. build() runs once per name, under the page's
+# lock, even when sessions ask for it concurrently.
+import os
+import threading
+import time
+
+class PageRegistry:
+    def __init__(self):
+        self.pages = {}
+        self.lock = threading.Lock()
+
+    def _entry(self, path):
+        # (Re)compile the page if it is new or its file changed on disk
+        mtime = os.stat(path).st_mtime_ns
+        with self.lock:
+            entry = self.pages.get(path)
+            if entry is None or entry["mtime"] != mtime:
+                entry = self._compile(path, mtime)
+                self.pages[path] = entry
+        return entry
+
+    def _compile(self, path, mtime):
+        t0 = time.perf_counter()
+        with open(path, encoding="utf-8") as f:
+            source = f.read()
+        return {
+            "mtime": mtime,
+            "code": compile(source, path, "exec"),
+            "resources": {},
+            "resources_lock": threading.RLock(),   # re-entrant: a build() may use other resources
+            "compile_ms": (time.perf_counter() - t0) * 1000,
+            "first_run_ms": None,
+            "last_run_ms": None,
+            "runs": 0,
+        }
+
+    def run(self, path, **extra_globals):
+        # Execute a page like `streamlit run <file>` would, reusing its compiled code
+        entry = self._entry(path)
+        resources, resources_lock = entry["resources"], entry["resources_lock"]
+
+        def page_resource(name, build):
+            with resources_lock:
+                if name not in resources:
+                    resources[name] = build()
+                return resources[name]
+
+        namespace = {"__name__": "__main__", "__file__": path,
+                     "__builtins__": __builtins__, "page_resource": page_resource}
+        namespace.update(extra_globals)
+        t0 = time.perf_counter()
+        try:
+            exec(entry["code"], namespace)
+        finally:
+            elapsed = (time.perf_counter() - t0) * 1000
+            with self.lock:
+                entry["runs"] += 1
+                entry["last_run_ms"] = elapsed
+                if entry["first_run_ms"] is None:
+                    entry["first_run_ms"] = elapsed
+        return entry
+
+    def report(self):
+        # One row per page seen so far, for the startup-time table
+        with self.lock:
+            pages = list(self.pages.items())
+        return [{
+            "Page": path,
+            "Compile (ms)": round(entry["compile_ms"], 2),
+            "First run (ms)": round(entry["first_run_ms"] or 0, 2),
+            "Last run (ms)": round(entry["last_run_ms"] or 0, 2),
+            "Runs": entry["runs"],
+            "Cached resources": len(entry["resources"]),
+        } for path, entry in pages]
+
+    def clear(self):
+        with self.lock:
+            self.pages.clear()
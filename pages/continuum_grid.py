@@ -0,0 +1,100 @@
+import os
+import zipfile
+import streamlit as st
+import pandas as pd
+import matplotlib.pyplot as plt
+import perf
+from cloudy_grid import continuum_sources, load_continuum_grid, stack_frame, RYD_TO_HZ
+from graphaway_core import render_graph, band_integrals, spectral_regions
+
+st.title("📚 Continuum Grid Comparison")
+# Server directories can only be read below CLOUDY_GRID_ROOT, and only when it is set
+GRID_ROOT = os.environ.get("CLOUDY_GRID_ROOT")
+
+st.write("Compare many Cloudy `save continuum` outputs at once: upload a zip of the files"
+         + (" or give a directory on the server" if GRID_ROOT else "")
+         + ". Every file is put on one frequency grid.")
+
+# ------------------ Input ------------------
+uploaded_zip = st.file_uploader("Zip of continuum files", type=["zip"])
+directory = st.text_input(f"...or a directory of continuum files under {GRID_ROOT}", "") if GRID_ROOT else ""
+column = st.selectbox("Continuum column", ["total", "incident", "trans", "DiffOut", "net trans", "reflc"])
+workers = st.number_input("Parser threads", min_value=1, max_value=64, value=min(32, (os.cpu_count() or 1) + 4))
+
+if uploaded_zip is not None:
+    try:
+        sources = continuum_sources(uploaded_zip)
+    except (ValueError, zipfile.BadZipFile) as e:
+        st.error(f"Could not read the zip: {e}")
+        st.stop()
+elif directory:
+    root = os.path.realpath(GRID_ROOT)
+    path = os.path.realpath(os.path.join(root, directory))
+    if os.path.commonpath([root, path]) != root:
+        st.error(f"Only directories under {GRID_ROOT} can be read.")
+        st.stop()
+    if not os.path.isdir(path):
+        st.error(f"Directory not found: {directory}")
+        st.stop()
+    sources = continuum_sources(path)
+else:
+    st.stop()
+
+if not sources:
+    st.error("No continuum files (.con, .cont, .continuum, .txt) found.")
+    st.stop()
+
+progress = st.progress(0.0, text=f"Parsing {len(sources)} files...")
+with perf.span("load_continuum_grid"):
+    names, grid, Y, errors = load_continuum_grid(sources, column=column, workers=int(workers),
+                                                 progress=lambda f: progress.progress(f, text=f"Parsing {len(sources)} files..."))
+progress.empty()
+for name, message in errors.items():
+    st.error(f"❌ {name}: {message}")
+if not names:
+    st.stop()
+st.caption(f"{len(names)} models on a common grid of {len(grid):,} frequencies")
+
+to_hz = st.checkbox("Convert ν from Rydberg to Hz", value=True)
+x_column = "ν (Hz)" if to_hz else "ν (Ryd)"
+stack = stack_frame(names, grid * RYD_TO_HZ if to_hz else grid, Y, x_column=x_column)
+
+# ------------------ Overlay ------------------
+st.subheader("Overlay")
+shown = st.multiselect("Models to plot", names, default=names[:20])
+log_axes = st.checkbox("Log axes", value=True)
+if shown:
+    with perf.span("render figure"):
+        fig, points_drawn, points_total = render_graph(
+            stack, x_column, shown,
+            [[name] for name in shown], [], [],
+            shown, [], [],
+            log_axes, log_axes, None, None,
+            f"{column} continuum", x_column, column,
+            {}, 6, show_background=to_hz, downsample="M4", show_legend=len(shown) <= 20
+        )
+    with perf.span("st.pyplot"):
+        st.pyplot(fig)
+        plt.close(fig)
+    if points_drawn < points_total:
+        st.caption(f"Downsampled (M4): drew {points_drawn:,} of {points_total:,} points")
+
+# ------------------ Band Integrals ------------------
+st.subheader("Band Integrals")
+st.caption(f"Bands are in {x_column} (trapezoid rule), integrated for every model at once.")
+bands_df = st.data_editor(
+    pd.DataFrame([(name, lo if to_hz else lo / RYD_TO_HZ, hi if to_hz else hi / RYD_TO_HZ)
+                  for name, lo, hi, _ in spectral_regions], columns=["Band", "Min", "Max"]),
+    num_rows="dynamic", key="grid_band_table"
+)
+bands = [(row.Band, float(row.Min), float(row.Max)) for row in bands_df.dropna().itertuples(index=False)]
+inverted = [str(name) for name, lo, hi in bands if lo > hi]
+if inverted:
+    st.error(f"Min is greater than Max for band(s): {', '.join(inverted)}.")
+elif bands:
+    # Models that do not cover part of the grid are NaN there; band_integrals skips those rows per model
+    with perf.span("band_integrals"):
+        fluxes = pd.DataFrame(band_integrals(stack[x_column].to_numpy(), Y, bands).T,
+                              index=names, columns=[band[0] for band in bands])
+    st.dataframe(fluxes.style.format("{:.4E}"))
+    st.download_button("⬇️ Download band fluxes (CSV)", fluxes.to_csv(), "grid_band_fluxes.csv", "text/csv")
@@ -0,0 +1,149 @@
+# Opt-in profiling for the Streamlit tools.
+#
+# Enable for every session with the environment variable PERF_PROFILE=1, or for
+# one session by adding ?profile=1 to the app URL. Each profiled rerun records
+# timing spans around its stages; with PERF_PROFILE=1 it also records the peak
+# traced memory (tracemalloc) of the rerun and of every span. Memory tracing
+# slows down the whole process, so a URL parameter never turns it on:
+#
+#   profile = perf.begin("Graphaway")
+#   with perf.span("parse"):
+#       ...
+#   perf.end(profile)            # draws the debug panel in the sidebar
+#
+# Without profiling, begin() returns None and span() costs one attribute lookup.
+# When PERF_JSONL names a file, every finished rerun is appended to it as one
+# JSON line. tracemalloc is process-wide, so memory figures from concurrent
+# profiled sessions overlap.
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+PERF_JSONL = os.environ.get("PERF_JSONL")
+HISTORY_LENGTH = 50
+
+# Streamlit runs each session's script in its own thread
+_local = threading.local()
+
+def memory_tracing_enabled():
+    return os.environ.get("PERF_PROFILE", "").lower() in ("1", "true", "yes")
+
+def profiling_requested():
+    if memory_tracing_enabled():
+        return True
+    import streamlit as st
+    return st.query_params.get("profile", "") in ("1", "true", "yes")
+
+class RerunProfile:
+    def __init__(self, tool, trace_memory):
+        self.tool = tool
+        self.trace_memory = trace_memory
+        self.started = time.time()
+        self.t0 = time.perf_counter()
+        self.spans = []          # finished spans, in order of completion
+        self.stack = []          # open spans
+        self.peak = 0
+        self.total_ms = None
+
+    def _note_peak(self):
+        # Fold the traced peak since the last reset into every open span and the
+        # rerun, then reset it so the next reading starts from current usage
+        if not self.trace_memory:
+            return
+        peak = tracemalloc.get_traced_memory()[1]
+        for open_span in self.stack:
+            open_span["peak_bytes"] = max(open_span["peak_bytes"], peak)
+        self.peak = max(self.peak, peak)
+        tracemalloc.reset_peak()
+
+    def record(self):
+        return {"tool": self.tool, "started": self.started, "total_ms": self.total_ms,
+                "peak_bytes": self.peak if self.trace_memory else None, "spans": self.spans}
+
+def current():
+    return getattr(_local, "profile", None)
+
+def begin(tool, enabled=None):
+    enabled = profiling_requested() if enabled is None else enabled
+    if not enabled:
+        _local.profile = None
+        return None
+    trace_memory = memory_tracing_enabled()
+    if trace_memory:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+    _local.profile = RerunProfile(tool, trace_memory)
+    return _local.profile
+
+@contextmanager
+def span(name):
+    profile = current()
+    if profile is None:
+        yield
+        return
+    profile._note_peak()
+    entry = {"name": name, "depth": len(profile.stack),
+             "start_ms": (time.perf_counter() - profile.t0) * 1000, "ms": None, "peak_bytes": 0}
+    profile.stack.append(entry)
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        entry["ms"] = (time.perf_counter() - t0) * 1000
+        profile._note_peak()
+        profile.stack.pop()
+        profile.spans.append(entry)
+
+def end(profile, panel=True):
+    # Finish the rerun, append it to PERF_JSONL and the session history, and
+    # draw the debug panel. Nothing can be drawn after st.stop(); a rerun cut
+    # short by it is only recorded when end() runs in a finally block, as in the
+    # cloudy_output_interpreter router.
+    if profile is None:
+        return None
+    import streamlit as st
+
+    profile._note_peak()
+    profile.total_ms = (time.perf_counter() - profile.t0) * 1000
+    _local.profile = None
+    record = profile.record()
+    if PERF_JSONL:
+        with open(PERF_JSONL, "a") as f:
+            f.write(json.dumps(record) + "\n")
+    history = st.session_state.setdefault("perf_history", [])
+    history.append(record)
+    del history[:-HISTORY_LENGTH]
+    if panel:
+        render_panel(record, history)
+    return record
+
+def render_panel(record, history):
+    import pandas as pd
+    import streamlit as st
+
+    traced = record["peak_bytes"] is not None
+    memory = f", peak {record['peak_bytes'] / 1024 ** 2:.1f} MB" if traced else ""
+    with st.sidebar.expander(f"🐢 Performance: {record['total_ms']:.0f} ms{memory}"):
+        spans = sorted(record["spans"], key=lambda s: s["start_ms"])
+        if spans:
+            table = pd.DataFrame([{
+                "Stage": " " * s["depth"] + s["name"],
+                "ms": round(s["ms"], 2),
+                "% of rerun": round(100 * s["ms"] / record["total_ms"], 1) if record["total_ms"] else 0,
+                "Peak MB": round(s["peak_bytes"] / 1024 ** 2, 2),
+            } for s in spans])
+            st.dataframe(table if traced else table.drop(columns="Peak MB"), hide_index=True)
+        else:
+            st.write("No instrumented stages ran.")
+        if not traced:
+            st.caption("Memory is traced only when the server runs with PERF_PROFILE=1.")
+        if len(history) > 1:
+            st.caption("Rerun totals (ms), oldest first")
+            st.line_chart(pd.DataFrame({"ms": [r["total_ms"] for r in history]}))
+        st.download_button("Download metrics (JSON lines)",
+                           "".join(json.dumps(r) + "\n" for r in history),
+                           f"{record['tool'].lower().replace(' ', '_')}_perf.jsonl", "application/json")